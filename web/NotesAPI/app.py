@@ -1,15 +1,53 @@
 from flask import Flask
+from cache import init_cache
 from database import db
+from idempotency import init_idempotency
+from instrumentation import init_instrumentation
+from json_provider import FastJSONProvider
+from models import init_collection_version, init_search_index
+from response_compression import init_compression
 from routes import bp as notes_bp
+from sqlite_profile import apply_sqlite_pragmas, sqlite_engine_options
 
-app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///notes.db"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
-db.init_app(app)
-app.register_blueprint(notes_bp)
+def create_app(config=None):
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///notes.db"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLITE_PRAGMAS"] = {}  # overrides for sqlite_profile.DEFAULT_PRAGMAS
+    app.config["NOTES_CACHE"] = "memory"  # "memory", "redis://host:port/db" or None to disable
+    app.config["NOTES_CACHE_TTL"] = 60
+    app.config["NOTES_CACHE_SIZE"] = 1024
+    app.config["INSTRUMENTATION"] = False  # Server-Timing headers and /metrics
+    app.config["INSTRUMENTATION_SLOW_MS"] = 0  # dump sampled stacks for slower requests
+    app.config["IDEMPOTENCY_TTL"] = 24 * 3600  # replay window for Idempotency-Key responses
+    app.config["COMPRESSION"] = True  # gzip/br/zstd for responses over COMPRESSION_MIN_SIZE bytes
+    app.config.update(config or {})
+    app.config.setdefault(
+            "SQLALCHEMY_ENGINE_OPTIONS",
+            sqlite_engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
+            )
 
-if __name__ == "__main__":
+    db.init_app(app)
+    apply_sqlite_pragmas(app, db)
+    init_cache(app)
+    init_idempotency(app)
+    init_instrumentation(app, db)
+    init_compression(app)
+    app.register_blueprint(notes_bp)
+    return app
+
+
+def init_db(app):
     with app.app_context():
         db.create_all()
+        init_search_index()
+        init_collection_version()
+
+
+app = create_app()
+
+if __name__ == "__main__":
+    init_db(app)
     app.run(debug=True)
@@ -0,0 +1,295 @@
+import os
+import json
+from quart import Blueprint, Quart, Response, request
+from sqlalchemy import delete, event, func, insert, inspect, literal_column, select, text, tuple_, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from database import db
+from sqlite_profile import DEFAULT_PRAGMAS, make_pragma_listener
+from models import CollectionVersion, Note, note_fts, COLLECTION_VERSION_DDL, SEARCH_INDEX_DDL
+from helpers import (
+        encode_cursor,
+        decode_cursor,
+        parse_limit,
+        build_match_query,
+        serialize_note,
+        serialize_note_rows,
+        serialize_search_hit,
+        invalid_note_fields,
+        bulk_result,
+        bulk_note_ids,
+        plan_bulk_operations,
+        note_etag,
+        collection_etag,
+        STREAM_BATCH_SIZE,
+        MAX_BULK_OPERATIONS
+        )
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATABASE_URL = os.environ.get(
+        "NOTES_ASYNC_DATABASE_URL",
+        f"sqlite+aiosqlite:///{os.path.join(BASE_DIR, 'instance', 'notes.db')}"
+        )
+POOL_SIZE = int(os.environ.get("NOTES_POOL_SIZE", 5))
+POOL_MAX_OVERFLOW = int(os.environ.get("NOTES_POOL_MAX_OVERFLOW", 5))
+POOL_TIMEOUT = float(os.environ.get("NOTES_POOL_TIMEOUT", 10))
+
+engine = create_async_engine(
+        DATABASE_URL,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_pre_ping=True
+        )
+event.listen(engine.sync_engine, "connect", make_pragma_listener(DEFAULT_PRAGMAS))
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+NOTE_COLUMNS = (Note.id, Note.title, Note.content, Note.created_at)
+
+bp = Blueprint("notes", __name__)
+
+
+def make_response(data=None, message="", status=200, meta=None, headers=None):
+    body = {
+        "status": "success" if 200 <= status < 300 else "error",
+        "message": message,
+        "data": data
+        }
+    if meta is not None:
+        body["meta"] = meta
+    return body, status, headers or {}
+
+
+def error_response(message, status=400):
+    return make_response(data=None, message=message, status=status)
+
+
+def etag_headers(etag):
+    return {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+
+
+def not_modified(etag):
+    if etag not in request.if_none_match:
+        return None
+    return Response("", status=304, headers=etag_headers(etag))
+
+
+@bp.route("/notes", methods=["GET"])
+async def get_all_notes():
+    if request.args.get("stream") in ("1", "true"):
+        return await stream_notes()
+
+    async with Session() as session:
+        version = await session.get(CollectionVersion, "note")
+        etag = collection_etag("notes", version.version if version else 0, request.query_string)
+        cached = not_modified(etag)
+        if cached: return cached
+
+        if "limit" not in request.args and "cursor" not in request.args:
+            rows = (await session.execute(select(*NOTE_COLUMNS))).all()
+            return make_response(
+                    data=serialize_note_rows(rows),
+                    message="All notes retrieved",
+                    headers=etag_headers(etag)
+                    )
+
+        limit = parse_limit(request.args.get("limit"))
+        if limit is None:
+            return error_response("Invalid limit")
+
+        query = select(*NOTE_COLUMNS).order_by(Note.created_at, Note.id)
+        cursor = request.args.get("cursor")
+        if cursor:
+            position = decode_cursor(cursor)
+            if position is None:
+                return error_response("Invalid cursor")
+            query = query.where(tuple_(Note.created_at, Note.id) > tuple_(*position))
+
+        rows = (await session.execute(query.limit(limit + 1))).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1]) if has_more else None
+    return make_response(
+            data=serialize_note_rows(rows),
+            message="Notes page retrieved",
+            meta={"limit": limit, "next_cursor": next_cursor},
+            headers=etag_headers(etag)
+            )
+
+
+async def stream_notes():
+    async def generate():
+        async with Session() as session:
+            stmt = (
+                    select(*NOTE_COLUMNS)
+                    .order_by(Note.created_at, Note.id)
+                    .execution_options(yield_per=STREAM_BATCH_SIZE)
+                    )
+            result = await session.stream(stmt)
+            async for row in result:
+                yield (json.dumps(serialize_note(row)) + "\n").encode()
+    return Response(generate(), mimetype="application/x-ndjson")
+
+
+@bp.route("/notes/search", methods=["GET"])
+async def search_notes():
+    match = build_match_query(request.args.get("q", ""))
+    if match is None:
+        return error_response("Missing search query")
+    limit = parse_limit(request.args.get("limit"))
+    if limit is None:
+        return error_response("Invalid limit")
+
+    fts = literal_column("note_fts")
+    stmt = (
+            select(
+                *NOTE_COLUMNS,
+                func.snippet(fts, -1, "<mark>", "</mark>", "...", 12).label("snippet"),
+                func.bm25(fts).label("rank")
+                )
+            .join_from(note_fts, Note, Note.id == note_fts.c.rowid)
+            .where(fts.op("MATCH")(match))
+            .order_by("rank")
+            .limit(limit)
+            )
+    async with Session() as session:
+        hits = (await session.execute(stmt)).all()
+    return make_response(data=[serialize_search_hit(h) for h in hits], message="Search results")
+
+
+@bp.route("/notes/<int:note_id>", methods=["GET"])
+async def get_one_note(note_id):
+    async with Session() as session:
+        note = await session.get(Note, note_id)
+    if not note:
+        return error_response("Note not found", status=404)
+
+    etag = note_etag(note.id, note.created_at, note.version)
+    cached = not_modified(etag)
+    if cached: return cached
+    return make_response(data=serialize_note(note), message="Note retrieved", headers=etag_headers(etag))
+
+
+@bp.route("/notes", methods=["POST"])
+async def create_note():
+    data = await request.get_json()
+    if not isinstance(data, dict):
+        return error_response("Expected a JSON object")
+    if "title" not in data:
+        return error_response("Missing fields: title")
+    invalid = invalid_note_fields(data)
+    if invalid:
+        return error_response(invalid, status=422)
+
+    async with Session() as session:
+        note = Note(title=data["title"], content=data.get("content"))
+        session.add(note)
+        await session.commit()
+    return make_response(data={"id": note.id}, message="Note created", status=201)
+
+
+@bp.route("/notes/<int:note_id>", methods=["PUT"])
+async def replace_note(note_id):
+    data = await request.get_json()
+    if not isinstance(data, dict):
+        return error_response("Expected a JSON object")
+    async with Session() as session:
+        note = await session.get(Note, note_id)
+        if not note:
+            return error_response("Note not found", status=404)
+        if "title" not in data:
+            return error_response("Missing fields: title")
+        invalid = invalid_note_fields(data)
+        if invalid:
+            return error_response(invalid, status=422)
+
+        note.title = data["title"]
+        note.content = data.get("content")
+        await session.commit()
+    return make_response(message="Note replaced")
+
+
+@bp.route("/notes/<int:note_id>", methods=["PATCH"])
+async def update_note(note_id):
+    data = await request.get_json()
+    if not isinstance(data, dict):
+        return error_response("Expected a JSON object")
+    async with Session() as session:
+        note = await session.get(Note, note_id)
+        if not note:
+            return error_response("Note not found", status=404)
+        invalid = invalid_note_fields(data)
+        if invalid:
+            return error_response(invalid, status=422)
+
+        if "title" in data:
+            note.title = data["title"]
+        if "content" in data:
+            note.content = data["content"]
+        await session.commit()
+    return make_response(message="Note updated")
+
+
+@bp.route("/notes/<int:note_id>", methods=["DELETE"])
+async def delete_note(note_id):
+    async with Session() as session:
+        note = await session.get(Note, note_id)
+        if not note:
+            return error_response("Note not found", status=404)
+
+        await session.delete(note)
+        await session.commit()
+    return make_response(message="Note deleted")
+
+
+@bp.route("/notes/bulk", methods=["POST"])
+async def bulk_notes():
+    operations = await request.get_json()
+    if not isinstance(operations, list):
+        return error_response("Expected a JSON array of operations")
+    if len(operations) > MAX_BULK_OPERATIONS:
+        return error_response(f"At most {MAX_BULK_OPERATIONS} operations per request")
+
+    async with Session() as session:
+        referenced = bulk_note_ids(operations)
+        live = set(await session.scalars(select(Note.id).where(Note.id.in_(referenced)))) if referenced else set()
+        results, creates, patches, deletes = plan_bulk_operations(operations, live)
+
+        if creates:
+            stmt = insert(Note).returning(Note.id, sort_by_parameter_order=True)
+            new_ids = (await session.scalars(stmt, [values for _, values in creates])).all()
+            for (index, _), note_id in zip(creates, new_ids):
+                results[index] = bulk_result(index, "create", 201, note_id, "Note created")
+        if patches:
+            await session.execute(update(Note), patches)
+        if deletes:
+            stmt = delete(Note).where(Note.id.in_(deletes))
+            await session.execute(stmt, execution_options={"synchronize_session": False})
+        await session.commit()
+
+    return make_response(data=results, message="Bulk operations applied")
+
+
+async def init_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(db.metadata.create_all)
+        existed = await conn.run_sync(lambda c: inspect(c).has_table("note_fts"))
+        for ddl in SEARCH_INDEX_DDL + COLLECTION_VERSION_DDL:
+            await conn.execute(text(ddl))
+        if not existed:
+            await conn.execute(text("INSERT INTO note_fts(note_fts) VALUES ('rebuild')"))
+
+
+app = Quart(__name__)
+app.register_blueprint(bp)
+
+
+@app.before_serving
+async def startup():
+    os.makedirs(app.instance_path, exist_ok=True)
+    await init_db()
+
+
+@app.after_serving
+async def shutdown():
+    await engine.dispose()
@@ -0,0 +1,246 @@
+"""Load test and latency benchmark for every route in routes.py.
+
+Seeds N notes, drives each scenario at the requested concurrency and reports
+p50/p95/p99 latency and requests per second. Results are written as JSON so
+runs can be diffed between commits.
+
+Usage:
+    python benchmarks/load.py --notes 10000 --requests 500 --concurrency 8
+    python benchmarks/load.py --url http://localhost:5000 --notes 1000
+    python benchmarks/load.py --compare benchmarks/results/old.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import count
+from pathlib import Path
+from types import SimpleNamespace
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from helpers import encode_cursor
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+SEED_BATCH = 1000
+
+
+class TestClientTarget:
+    # Drives the app in-process through Flask's test client (one client per thread)
+    def __init__(self, cache):
+        from app import create_app, init_db
+
+        path = os.path.join(tempfile.mkdtemp(), "load.db")
+        self.app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+            "NOTES_CACHE": "memory" if cache else None
+            })
+        init_db(self.app)
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        response.get_data()
+        return response.status_code, response
+
+
+class HTTPTarget:
+    # Drives an already running server over HTTP
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.url + path, data=data, method=method)
+        if data is not None:
+            req.add_header("Content-Type", "application/json")
+        try:
+            with urllib.request.urlopen(req) as response:
+                payload = response.read()
+                return response.status, payload
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()
+
+
+def json_body(target, response):
+    if isinstance(response, (bytes, bytearray)):
+        return json.loads(response)
+    return response.get_json()
+
+
+def seed(target, total):
+    ids = []
+    for start in range(0, total, SEED_BATCH):
+        batch = [
+                {"op": "create", "title": f"Note {i}", "content": f"seeded content number {i} " * 5}
+                for i in range(start, min(start + SEED_BATCH, total))
+                ]
+        status, response = target.request("POST", "/notes/bulk", batch)
+        if status != 200:
+            raise SystemExit(f"Seeding failed with status {status}")
+        ids += [r["id"] for r in json_body(target, response)["data"]]
+    return ids
+
+
+def build_scenarios(target, ids, args):
+    rng = random.Random(args.seed)
+    middle = len(ids) // 2
+    status, response = target.request("GET", f"/notes/{ids[middle]}")
+    note = json_body(target, response)["data"]
+    deep_cursor = encode_cursor(SimpleNamespace(
+            id=note["id"], created_at=datetime.fromisoformat(note["created_at"])))
+
+    # Notes reserved for DELETE so the other scenarios never hit a 404
+    deletable = iter(ids[-args.requests:])
+    live = ids[:-args.requests] or ids
+    created = count()
+
+    return {
+        "list_all": lambda: ("GET", "/notes", None),
+        "list_page": lambda: ("GET", "/notes?limit=50", None),
+        "list_page_deep": lambda: ("GET", f"/notes?limit=50&cursor={deep_cursor}", None),
+        "stream": lambda: ("GET", "/notes?stream=1", None),
+        "search": lambda: ("GET", f"/notes/search?q=number%20{rng.randrange(len(ids))}", None),
+        "get_one": lambda: ("GET", f"/notes/{rng.choice(live)}", None),
+        "create": lambda: ("POST", "/notes", {"title": f"Load {next(created)}", "content": "load test"}),
+        "replace": lambda: ("PUT", f"/notes/{rng.choice(live)}", {"title": "Replaced", "content": "load test"}),
+        "update": lambda: ("PATCH", f"/notes/{rng.choice(live)}", {"content": "patched"}),
+        "delete": lambda: ("DELETE", f"/notes/{next(deletable)}", None),
+        "bulk": lambda: ("POST", "/notes/bulk", [{"op": "create", "title": f"Bulk {next(created)}"} for _ in range(100)]),
+        "cache_stats": lambda: ("GET", "/cache/stats", None),
+        }
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def run_scenario(target, make_request, total, concurrency):
+    lock = threading.Lock()
+    plan = [make_request() for _ in range(total)]
+    latencies, errors = [], 0
+
+    def call(spec):
+        nonlocal errors
+        method, path, body = spec
+        start = time.perf_counter()
+        status, _ = target.request(method, path, body)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if status >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, plan))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / wall, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3)
+        }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, text=True
+                ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results):
+    print(f"{'scenario':16} {'rps':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, r in results.items():
+        print(f"{name:16} {r['rps']:>10} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {r['errors']:>7}")
+
+
+def print_comparison(old, new):
+    print(f"\n{'scenario':16} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9}   (vs {old['meta'].get('commit')})")
+    for name, r in new["results"].items():
+        before = old["results"].get(name)
+        if not before:
+            continue
+        cells = []
+        for key in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+            change = (r[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            cells.append(f"{change:+8.1f}%")
+        print(f"{name:16} " + " ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=10000, help="notes to seed")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--scenarios", help="comma separated subset of scenarios to run")
+    parser.add_argument("--url", help="benchmark a running server instead of the test client")
+    parser.add_argument("--no-cache", action="store_true", help="disable the read-through cache (test client only)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for request selection")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", help="previous results file to diff against")
+    args = parser.parse_args()
+
+    target = HTTPTarget(args.url) if args.url else TestClientTarget(cache=not args.no_cache)
+    ids = seed(target, args.notes + args.requests)
+    scenarios = build_scenarios(target, ids, args)
+    if args.scenarios:
+        scenarios = {name: scenarios[name] for name in args.scenarios.split(",")}
+
+    results = {}
+    for name, make_request in scenarios.items():
+        results[name] = run_scenario(target, make_request, args.requests, args.concurrency)
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "target": args.url or "test_client",
+            "notes": args.notes,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "cache": not args.no_cache,
+            "python": platform.python_version()
+            },
+        "results": results
+        }
+
+    print_table(results)
+    output = Path(args.output) if args.output else RESULTS_DIR / (
+            f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'nogit'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        print_comparison(json.loads(Path(args.compare).read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
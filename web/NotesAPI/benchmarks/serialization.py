@@ -0,0 +1,69 @@
+"""Micro-benchmark: ORM + serialize_notes + stdlib jsonify vs the fast path.
+
+Usage: python benchmarks/serialization.py [rows] [repeat]
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import insert, select
+
+from database import db
+from helpers import serialize_note_rows, serialize_notes
+from json_provider import FastJSONProvider, orjson
+from models import Note
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+REPEAT = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+
+def current_path(app):
+    notes = Note.query.all()
+    return app.json.response(serialize_notes(notes))
+
+
+def fast_path(app):
+    rows = db.session.execute(select(Note.id, Note.title, Note.content, Note.created_at)).all()
+    return app.json.response(serialize_note_rows(rows))
+
+
+def best_of(fn, app):
+    timings = []
+    for _ in range(REPEAT):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        body = fn(app).get_data()
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(body)
+
+
+def main():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Note), [
+            {"title": f"Note {i}", "content": "lorem ipsum dolor sit amet " * 4}
+            for i in range(ROWS)
+            ])
+        db.session.commit()
+
+        app.json = DefaultJSONProvider(app)
+        baseline, size = best_of(current_path, app)
+        app.json = FastJSONProvider(app)
+        fast, fast_size = best_of(fast_path, app)
+
+    print(f"rows={ROWS} repeat={REPEAT} orjson={'yes' if orjson else 'no'}")
+    print(f"current  {baseline * 1000:8.1f} ms  {size} bytes")
+    print(f"fast     {fast * 1000:8.1f} ms  {fast_size} bytes")
+    print(f"speedup  {baseline / fast:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Concurrent read/write throughput: default SQLite settings vs sqlite_profile.
+
+Usage: python benchmarks/sqlite_profile.py [seconds] [readers] [writers]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.exc import OperationalError
+
+from database import db
+from models import Note
+from sqlite_profile import DEFAULT_PRAGMAS, make_pragma_listener, sqlite_engine_options
+
+SECONDS = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+READERS = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+WRITERS = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+
+def make_engine(path, tuned):
+    uri = f"sqlite:///{path}"
+    if not tuned:
+        return create_engine(uri, connect_args={"check_same_thread": False})
+    engine = create_engine(uri, **sqlite_engine_options(uri))
+    event.listen(engine, "connect", make_pragma_listener(DEFAULT_PRAGMAS))
+    return engine
+
+
+def run(tuned):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = make_engine(path, tuned)
+    db.metadata.create_all(engine, tables=[Note.__table__])
+    with engine.begin() as conn:
+        conn.execute(insert(Note), [{"title": f"seed {i}", "content": "x" * 200} for i in range(5000)])
+
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + SECONDS
+
+    def reader():
+        while time.perf_counter() < deadline:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(select(func.count(Note.id))).scalar()
+                    conn.execute(select(Note.id, Note.title).order_by(Note.id.desc()).limit(50)).all()
+                key = "reads"
+            except OperationalError:
+                key = "locked"
+            with lock:
+                counts[key] += 1
+
+    def writer():
+        while time.perf_counter() < deadline:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(Note).values(title="bench", content="y" * 200))
+                key = "writes"
+            except OperationalError:
+                key = "locked"
+            with lock:
+                counts[key] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(READERS)]
+    threads += [threading.Thread(target=writer) for _ in range(WRITERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+    return counts
+
+
+def main():
+    print(f"seconds={SECONDS} readers={READERS} writers={WRITERS}")
+    for label, tuned in (("default", False), ("profile", True)):
+        c = run(tuned)
+        print(
+            f"{label:8} reads/s {c['reads'] / SECONDS:9.1f}  "
+            f"writes/s {c['writes'] / SECONDS:8.1f}  locked errors {c['locked']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+LIST_GENERATION_KEY = "notes:list:generation"
+
+
+class LRUCache:
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        # Counters are kept apart from the LRU so eviction can never reset them
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache:
+    def __init__(self, url, ttl=60):
+        import redis
+
+        self.ttl = ttl
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self._client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value):
+        self._client.set(key, json.dumps(value), ex=self.ttl)
+
+    def delete(self, *keys):
+        if keys:
+            self._client.delete(*keys)
+
+    def counter(self, key):
+        return int(self._client.get(key) or 0)
+
+    def incr(self, key):
+        return self._client.incr(key)
+
+    def __len__(self):
+        return self._client.dbsize()
+
+
+class NullCache:
+    ttl = 0
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def counter(self, key):
+        return 0
+
+    def incr(self, key):
+        return 0
+
+    def __len__(self):
+        return 0
+
+
+class CacheStats:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = getattr(backend, "_lock", None) or threading.Lock()
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "size": len(self.backend),
+            "ttl": self.backend.ttl
+        }
+
+
+def init_cache(app):
+    app.config.setdefault("NOTES_CACHE", "memory")
+    app.config.setdefault("NOTES_CACHE_SIZE", 1024)
+    app.config.setdefault("NOTES_CACHE_TTL", 60)
+
+    kind = app.config["NOTES_CACHE"]
+    ttl = app.config["NOTES_CACHE_TTL"]
+    if not kind:
+        backend = NullCache()
+    elif kind == "memory":
+        backend = LRUCache(maxsize=app.config["NOTES_CACHE_SIZE"], ttl=ttl)
+    elif kind.startswith(("redis://", "rediss://", "unix://")):
+        backend = RedisCache(kind, ttl=ttl)
+    else:
+        raise ValueError(f"Unknown NOTES_CACHE backend: {kind}")
+    app.extensions["notes_cache"] = CacheStats(backend)
+
+
+def get_cache():
+    return current_app.extensions.get("notes_cache") or CacheStats(NullCache())
+
+
+def note_key(note_id):
+    return f"notes:item:{note_id}"
+
+
+def list_key(cache, query_string):
+    generation = cache.counter(LIST_GENERATION_KEY)
+    return f"notes:list:{generation}:{query_string.decode()}"
+
+
+def invalidate_notes(*note_ids):
+    cache = get_cache()
+    cache.delete(*(note_key(i) for i in note_ids))
+    cache.incr(LIST_GENERATION_KEY)
@@ -1,11 +1,26 @@
-from flask import jsonify
+import base64
+import json
+from datetime import datetime
+import hashlib
+from flask import Response, jsonify, request, stream_with_context
 
-def make_response(data=None, message="", status=200):
-    return jsonify({
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 1000
+MAX_BULK_OPERATIONS = 5000
+
+
+def make_response(data=None, message="", status=200, meta=None, headers=None):
+    body = {
         "status": "success" if 200 <= status < 300 else "error",
         "message": message,
         "data": data
-        }), status
+        }
+    if meta is not None:
+        body["meta"] = meta
+    if headers:
+        return jsonify(body), status, headers
+    return jsonify(body), status
 
 
 def get_note_or_404(note_id, model):
@@ -28,12 +43,166 @@ def serialize_notes(notes):
     return [serialize_note(n) for n in notes]
 
 
+def serialize_note_rows(rows):
+    # Fast path for (id, title, content, created_at) tuples from a column select
+    return [
+            {"id": i, "title": t, "content": c, "created_at": ts.isoformat()}
+            for i, t, c, ts in rows
+            ]
+
+
+def make_ndjson_response(rows, serializer):
+    def generate():
+        for row in rows:
+            yield json.dumps(serializer(row)) + "\n"
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+def bulk_result(index, op, status, note_id=None, message=""):
+    return {"index": index, "op": op, "status": status, "id": note_id, "message": message}
+
+
+def is_note_id(value):
+    # JSON true/false arrive as bool, a subclass of int (True == 1 would match note 1)
+    return type(value) is int
+
+
+def bulk_note_ids(operations):
+    return {
+            op.get("id") for op in operations
+            if isinstance(op, dict) and is_note_id(op.get("id"))
+            }
+
+
+def plan_bulk_operations(operations, live):
+    # Shared by the Flask and ASGI /notes/bulk routes: validates each operation against
+    # the set of existing note ids and groups the valid ones for one statement per kind.
+    # Creates get their result once the insert returns their ids.
+    results = [None] * len(operations)
+    creates, patches, deletes = [], [], []
+    live = set(live)
+
+    for index, op in enumerate(operations):
+        kind = op.get("op") if isinstance(op, dict) else None
+        if kind == "create":
+            if "title" not in op:
+                results[index] = bulk_result(index, kind, 400, message="Missing fields: title")
+                continue
+            values = {"title": op["title"], "content": op.get("content")}
+            invalid = invalid_note_fields(values)
+            if invalid:
+                results[index] = bulk_result(index, kind, 422, message=invalid)
+                continue
+            creates.append((index, values))
+        elif kind in ("patch", "delete"):
+            note_id = op.get("id")
+            if not is_note_id(note_id) or note_id not in live:
+                results[index] = bulk_result(index, kind, 404, note_id, "Note not found")
+                continue
+            if kind == "delete":
+                live.discard(note_id)
+                deletes.append(note_id)
+                results[index] = bulk_result(index, kind, 200, note_id, "Note deleted")
+                continue
+            values = {field: op[field] for field in ("title", "content") if field in op}
+            invalid = invalid_note_fields(values)
+            if invalid:
+                results[index] = bulk_result(index, kind, 422, note_id, invalid)
+                continue
+            if values:
+                patches.append({"id": note_id, **values})
+            results[index] = bulk_result(index, kind, 200, note_id, "Note updated")
+        else:
+            results[index] = bulk_result(index, kind, 400, message="Unknown operation")
+
+    return results, creates, patches, deletes
+
+
+def build_match_query(q):
+    terms = [t.replace('"', '""') for t in q.split()]
+    if not terms:
+        return None
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def serialize_search_hit(row):
+    return {**serialize_note(row), "snippet": row.snippet, "rank": row.rank}
+
+
+def note_etag(note_id, created_at, version):
+    return f"note-{note_id}-{created_at.timestamp():.6f}-{version}"
+
+
+def collection_etag(name, version, query_string=None):
+    if query_string is None:
+        query_string = request.query_string
+    args = hashlib.sha1(query_string).hexdigest()[:12]
+    return f"{name}-{version}-{args}"
+
+
+def etag_headers(etag):
+    return {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+
+
+def not_modified(etag):
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    response.headers.update(etag_headers(etag))
+    return response
+
+
+def validate_json_object(data):
+    if not isinstance(data, dict):
+        return make_response(message="Expected a JSON object", status=400)
+    return None
+
+
 def validate_json_fields(data, required_fields):
+    invalid = validate_json_object(data)
+    if invalid:
+        return invalid
     missing = [field for field in required_fields if field not in data]
     if missing:
         return make_response(message=f"Missing fields: {', '.join(missing)}", status=400)
     return None
 
 
+def invalid_note_fields(values):
+    if "title" in values and not isinstance(values["title"], str):
+        return "title must be a string"
+    if values.get("content") is not None and not isinstance(values["content"], str):
+        return "content must be a string or null"
+    return None
+
+
 def error_response(message, status=400):
     return make_response(data=None, message=message, status=status)
+
+
+def encode_cursor(note):
+    raw = f"{note.created_at.isoformat()}|{note.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, note_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(note_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        return None
+    if limit < 1:
+        return None
+    return min(limit, maximum)
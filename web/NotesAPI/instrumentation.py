@@ -0,0 +1,202 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from flask import Response, g, has_app_context, request
+from sqlalchemy import event
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter()
+        self.buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self.durations = Counter()
+        self.sql_queries = Counter()
+        self.sql_seconds = Counter()
+        self.json_seconds = Counter()
+
+    def observe(self, method, route, status, total, sql_count, sql_time, json_time):
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            key = (method, route)
+            buckets = self.buckets[key]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if total <= bound:
+                    buckets[i] += 1
+            self.durations[key] += total
+            self.sql_queries[key] += sql_count
+            self.sql_seconds[key] += sql_time
+            self.json_seconds[key] += json_time
+
+    def render(self):
+        # Counters are per process; under serve.py each worker reports its own series
+        worker = f'worker_pid="{os.getpid()}"'
+        lines = [f"# Metrics of worker process {os.getpid()} only"]
+        with self._lock:
+            lines += [
+                    "# HELP http_requests_total Requests handled, by route and status.",
+                    "# TYPE http_requests_total counter"
+                    ]
+            for (method, route, status), value in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{{worker},method="{method}",route="{route}",status="{status}"}} {value}')
+
+            lines += [
+                    "# HELP http_request_duration_seconds Request latency.",
+                    "# TYPE http_request_duration_seconds histogram"
+                    ]
+            for (method, route), buckets in sorted(self.buckets.items()):
+                labels = f'{worker},method="{method}",route="{route}"'
+                count = sum(v for (m, r, _), v in self.requests.items() if (m, r) == (method, route))
+                for bound, value in zip(DURATION_BUCKETS, buckets):
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {value}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {self.durations[(method, route)]:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {count}")
+
+            for name, help_text, values, fmt in (
+                    ("db_queries_total", "SQL statements executed.", self.sql_queries, "{}"),
+                    ("db_query_duration_seconds_total", "Time spent in SQL statements.", self.sql_seconds, "{:.6f}"),
+                    ("serialization_duration_seconds_total", "Time spent encoding JSON responses.", self.json_seconds, "{:.6f}")
+                    ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for (method, route), value in sorted(values.items()):
+                    lines.append(f'{name}{{{worker},method="{method}",route="{route}"}} ' + fmt.format(value))
+        return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    # One daemon thread samples the stacks of every thread that is currently
+    # serving a request; stacks are kept in collapsed ("folded") form.
+    def __init__(self, interval):
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="request-sampler", daemon=True)
+        self._thread.start()
+
+    def start(self):
+        samples = Counter()
+        with self._lock:
+            self._active[threading.get_ident()] = samples
+        return samples
+
+    def stop(self):
+        with self._lock:
+            return self._active.pop(threading.get_ident(), Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, samples in active:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples[fold_stack(frame)] += 1
+
+
+def fold_stack(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+def init_instrumentation(app, db):
+    app.config.setdefault("INSTRUMENTATION", False)
+    app.config.setdefault("INSTRUMENTATION_SLOW_MS", 0)  # 0 disables the sampling profiler
+    app.config.setdefault("INSTRUMENTATION_SAMPLE_INTERVAL", 0.005)
+    app.config.setdefault("INSTRUMENTATION_PROFILE_DIR", os.path.join(app.instance_path, "profiles"))
+    if not app.config["INSTRUMENTATION"]:
+        return
+
+    metrics = Metrics()
+    slow_ms = app.config["INSTRUMENTATION_SLOW_MS"]
+    profiler = SamplingProfiler(app.config["INSTRUMENTATION_SAMPLE_INTERVAL"]) if slow_ms else None
+    app.extensions["instrumentation"] = metrics
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        timing = g.get("timing") if has_app_context() else None
+        if timing is not None:
+            timing["sql_count"] += 1
+            timing["sql_time"] += elapsed
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+    encode = app.json.response
+
+    def timed_response(*args, **kwargs):
+        start = time.perf_counter()
+        response = encode(*args, **kwargs)
+        timing = g.get("timing")
+        if timing is not None:
+            timing["json_time"] += time.perf_counter() - start
+        return response
+
+    app.json.response = timed_response
+
+    @app.before_request
+    def start_timer():
+        g.timing = {"start": time.perf_counter(), "sql_count": 0, "sql_time": 0.0, "json_time": 0.0}
+        if profiler:
+            profiler.start()
+
+    @app.after_request
+    def record_timing(response):
+        timing = g.pop("timing", None)
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing["start"]
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        app_time = max(total - timing["sql_time"] - timing["json_time"], 0.0)
+
+        response.headers["Server-Timing"] = ", ".join([
+            f'sql;dur={timing["sql_time"] * 1000:.2f};desc="{timing["sql_count"]} queries"',
+            f'json;dur={timing["json_time"] * 1000:.2f}',
+            f"app;dur={app_time * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}"
+            ])
+        metrics.observe(
+                request.method, route, response.status_code,
+                total, timing["sql_count"], timing["sql_time"], timing["json_time"]
+                )
+
+        if profiler:
+            samples = profiler.stop()
+            if total * 1000 >= slow_ms and samples:
+                dump_profile(app.config["INSTRUMENTATION_PROFILE_DIR"], request.method, route, total, samples)
+        return response
+
+    @app.teardown_request
+    def stop_sampling(exc):
+        if profiler:
+            profiler.stop()
+
+    @app.route("/metrics")
+    def prometheus_metrics():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+def dump_profile(directory, method, route, total, samples):
+    os.makedirs(directory, exist_ok=True)
+    slug = route.strip("/").replace("/", "_").replace("<", "").replace(">", "").replace(":", "-") or "root"
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{slug}-{total * 1000:.0f}ms.folded"
+    with open(os.path.join(directory, name), "w") as fh:
+        for stack, count in samples.most_common():
+            fh.write(f"{stack} {count}\n")
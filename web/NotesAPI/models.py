@@ -1,4 +1,5 @@
 from datetime import datetime
+from sqlalchemy import column, inspect, table, text
 from database import db
 
 class Note(db.Model):
@@ -6,3 +7,83 @@ class Note(db.Model):
     title = db.Column(db.String(64), nullable=False)
     content = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1, onupdate=text("version + 1"))
+
+    __table_args__ = (
+        db.Index("ix_note_created_at_id", "created_at", "id"),
+    )
+
+
+class CollectionVersion(db.Model):
+    name = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Stored responses for Idempotency-Key requests (see idempotency.py).
+# status is NULL while the first request with the key is still running.
+class IdempotencyKey(db.Model):
+    __tablename__ = "idempotency_key"
+
+    key = db.Column(db.String(255), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.Integer, nullable=True)
+    mimetype = db.Column(db.String(64), nullable=True)
+    body = db.Column(db.LargeBinary, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_idempotency_key_expires_at", "expires_at"),
+        {"sqlite_with_rowid": False},
+    )
+
+
+# External-content FTS5 index over note.title/content. It lives outside the
+# SQLAlchemy metadata, so it is declared as a lightweight table for queries
+# and created by init_search_index().
+note_fts = table("note_fts", column("rowid"), column("title"), column("content"))
+
+SEARCH_INDEX_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS note_fts USING fts5(
+        title, content, content='note', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS note_fts_ai AFTER INSERT ON note BEGIN
+        INSERT INTO note_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS note_fts_ad AFTER DELETE ON note BEGIN
+        INSERT INTO note_fts(note_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS note_fts_au AFTER UPDATE OF title, content ON note BEGIN
+        INSERT INTO note_fts(note_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO note_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+]
+
+
+def init_search_index():
+    existed = inspect(db.engine).has_table("note_fts")
+    with db.engine.begin() as conn:
+        for ddl in SEARCH_INDEX_DDL:
+            conn.execute(text(ddl))
+        if not existed:
+            conn.execute(text("INSERT INTO note_fts(note_fts) VALUES ('rebuild')"))
+
+
+# Every write to the note table bumps one counter row, so the whole
+# collection can be revalidated with a single primary-key lookup.
+COLLECTION_VERSION_DDL = [
+    "INSERT OR IGNORE INTO collection_version(name, version) VALUES ('note', 0)",
+] + [
+    f"""CREATE TRIGGER IF NOT EXISTS note_version_{suffix} AFTER {event} ON note BEGIN
+        UPDATE collection_version SET version = version + 1 WHERE name = 'note';
+    END"""
+    for suffix, event in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE"))
+]
+
+
+def init_collection_version():
+    with db.engine.begin() as conn:
+        for ddl in COLLECTION_VERSION_DDL:
+            conn.execute(text(ddl))
@@ -0,0 +1,147 @@
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+COMPRESSIBLE_MIMETYPES = (
+        "application/json",
+        "application/x-ndjson",
+        "text/html",
+        "text/plain",
+        "text/css",
+        "application/javascript"
+        )
+STREAM_FLUSH_BYTES = 64 * 1024
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._obj.process(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+def available_encodings():
+    encodings = {"gzip": GzipCompressor}
+    if brotli is not None:
+        encodings["br"] = BrotliCompressor
+    if zstandard is not None:
+        encodings["zstd"] = ZstdCompressor
+    return encodings
+
+
+def compress(encoding, level, data):
+    compressor = available_encodings()[encoding](level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_stream(chunks, compressor):
+    # Output is flushed every STREAM_FLUSH_BYTES of input so clients keep receiving data
+    pending = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            out = compressor.compress(chunk)
+            pending += len(chunk)
+            if pending >= STREAM_FLUSH_BYTES:
+                out += compressor.flush()
+                pending = 0
+            if out:
+                yield out
+        yield compressor.finish()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+def init_compression(app):
+    app.config.setdefault("COMPRESSION", True)
+    app.config.setdefault("COMPRESSION_MIN_SIZE", 1024)
+    app.config.setdefault("COMPRESSION_LEVELS", {})  # overrides for DEFAULT_LEVELS
+    app.config.setdefault("COMPRESSION_ENCODINGS", ("zstd", "br", "gzip"))  # server preference order
+    app.config.setdefault("COMPRESSION_MIMETYPES", COMPRESSIBLE_MIMETYPES)
+    if not app.config["COMPRESSION"]:
+        return
+
+    encodings = available_encodings()
+    preferred = [e for e in app.config["COMPRESSION_ENCODINGS"] if e in encodings]
+    levels = {**DEFAULT_LEVELS, **app.config["COMPRESSION_LEVELS"]}
+    min_size = app.config["COMPRESSION_MIN_SIZE"]
+    mimetypes = set(app.config["COMPRESSION_MIMETYPES"])
+
+    @app.after_request
+    def compress_response(response):
+        if (
+                response.mimetype not in mimetypes
+                or response.status_code != 200
+                or request.method == "HEAD"
+                or "Content-Encoding" in response.headers
+                or response.direct_passthrough
+                ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = next((e for e in preferred if request.accept_encodings[e]), None)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encodings[encoding](levels[encoding]))
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compress(encoding, levels[encoding], data))
+
+        response.headers["Content-Encoding"] = encoding
+        # The ETag names the uncompressed representation; weak comparison keeps 304s working
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
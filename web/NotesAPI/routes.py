@@ -1,40 +1,170 @@
 from flask import Blueprint, request
+from sqlalchemy import delete, func, insert, literal_column, select, tuple_, update
 from sqlalchemy.orm import declarative_base
-from models import Note
+from models import CollectionVersion, Note, note_fts
 from database import db
+from cache import get_cache, invalidate_notes, list_key, note_key
+from idempotency import idempotent
 from helpers import (
         make_response,
         error_response,
         get_note_or_404,
+        validate_json_object,
         validate_json_fields,
+        invalid_note_fields,
         serialize_note,
-        serialize_notes
+        serialize_note_rows,
+        encode_cursor,
+        decode_cursor,
+        parse_limit,
+        make_ndjson_response,
+        bulk_result,
+        bulk_note_ids,
+        plan_bulk_operations,
+        build_match_query,
+        serialize_search_hit,
+        note_etag,
+        collection_etag,
+        etag_headers,
+        not_modified,
+        STREAM_BATCH_SIZE,
+        MAX_BULK_OPERATIONS
         )
 
 bp = Blueprint('notes', __name__)
 
+NOTE_COLUMNS = (Note.id, Note.title, Note.content, Note.created_at)
+
 @bp.route("/notes", methods=["GET"])
 def get_all_notes():
-    notes = Note.query.all()
-    return make_response(data=serialize_notes(notes), message="All notes retrieved")
+    if request.args.get("stream") in ("1", "true"):
+        return stream_notes()
+
+    cache = get_cache()
+    key = list_key(cache, request.query_string)
+    listing = cache.get(key)
+    if listing is None:
+        version = db.session.get(CollectionVersion, "note")
+        etag = collection_etag("notes", version.version if version else 0)
+        cached = not_modified(etag)
+        if cached: return cached
+
+        listing = load_notes_listing()
+        if isinstance(listing, tuple): return listing
+        listing["etag"] = etag
+        if listing["meta"] is not None:
+            cache.set(key, listing)
+
+    cached = not_modified(listing["etag"])
+    if cached: return cached
+    return make_response(
+            data=listing["data"],
+            message=listing["message"],
+            meta=listing["meta"],
+            headers=etag_headers(listing["etag"])
+            )
+
+
+def load_notes_listing():
+    if "limit" not in request.args and "cursor" not in request.args:
+        rows = db.session.execute(select(*NOTE_COLUMNS)).all()
+        return {"data": serialize_note_rows(rows), "message": "All notes retrieved", "meta": None}
+
+    limit = parse_limit(request.args.get("limit"))
+    if limit is None:
+        return error_response("Invalid limit")
+
+    query = select(*NOTE_COLUMNS).order_by(Note.created_at, Note.id)
+    cursor = request.args.get("cursor")
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            return error_response("Invalid cursor")
+        query = query.where(tuple_(Note.created_at, Note.id) > tuple_(*position))
+
+    rows = db.session.execute(query.limit(limit + 1)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1]) if has_more else None
+    return {
+            "data": serialize_note_rows(rows),
+            "message": "Notes page retrieved",
+            "meta": {"limit": limit, "next_cursor": next_cursor}
+            }
+
+
+def stream_notes():
+    stmt = (
+            select(*NOTE_COLUMNS)
+            .order_by(Note.created_at, Note.id)
+            .execution_options(yield_per=STREAM_BATCH_SIZE)
+            )
+    rows = db.session.execute(stmt)
+    return make_ndjson_response(rows, serialize_note)
+
+
+@bp.route("/notes/search", methods=["GET"])
+def search_notes():
+    match = build_match_query(request.args.get("q", ""))
+    if match is None:
+        return error_response("Missing search query")
+    limit = parse_limit(request.args.get("limit"))
+    if limit is None:
+        return error_response("Invalid limit")
+
+    fts = literal_column("note_fts")
+    stmt = (
+            select(
+                Note.id, Note.title, Note.content, Note.created_at,
+                func.snippet(fts, -1, "<mark>", "</mark>", "...", 12).label("snippet"),
+                func.bm25(fts).label("rank")
+                )
+            .join_from(note_fts, Note, Note.id == note_fts.c.rowid)
+            .where(fts.op("MATCH")(match))
+            .order_by("rank")
+            .limit(limit)
+            )
+    hits = db.session.execute(stmt).all()
+    return make_response(data=[serialize_search_hit(h) for h in hits], message="Search results")
 
 
 @bp.route("/notes/<int:note_id>", methods=["GET"])
 def get_one_note(note_id):
+    cache = get_cache()
+    entry = cache.get(note_key(note_id))
+    if entry is not None:
+        cached = not_modified(entry["etag"])
+        if cached: return cached
+        return make_response(data=entry["data"], message="Note retrieved", headers=etag_headers(entry["etag"]))
+
+    stamp = db.session.execute(
+            select(Note.created_at, Note.version).where(Note.id == note_id)
+            ).first()
+    if stamp:
+        etag = note_etag(note_id, *stamp)
+        cached = not_modified(etag)
+        if cached: return cached
+
     note = get_note_or_404(note_id, Note)
     if isinstance(note, tuple): return note
-    return make_response(data=serialize_note(note), message="Note retrieved")
+    entry = {"data": serialize_note(note), "etag": note_etag(note.id, note.created_at, note.version)}
+    cache.set(note_key(note_id), entry)
+    return make_response(data=entry["data"], message="Note retrieved", headers=etag_headers(entry["etag"]))
 
 
 @bp.route("/notes", methods=["POST"])
+@idempotent
 def create_note():
     data = request.get_json()
     validation = validate_json_fields(data, ["title"])
     if validation: return validation
+    invalid = invalid_note_fields(data)
+    if invalid: return error_response(invalid, status=422)
 
     note = Note(title=data["title"], content=data.get("content"))
     db.session.add(note)
     db.session.commit()
+    invalidate_notes()
     return make_response(data={"id": note.id}, message="Note created", status=201)
 
 
@@ -46,10 +176,13 @@ def replace_note(note_id):
     data = request.get_json()
     validation = validate_json_fields(data, ["title"])
     if validation: return validation
+    invalid = invalid_note_fields(data)
+    if invalid: return error_response(invalid, status=422)
 
     note.title = data["title"]
     note.content = data.get("content")
     db.session.commit()
+    invalidate_notes(note_id)
     return make_response(message="Note replaced")
 
 @bp.route("/notes/<int:note_id>", methods=["PATCH"])
@@ -58,11 +191,16 @@ def update_note(note_id):
     if isinstance(note, tuple): return note
 
     data = request.get_json()
+    validation = validate_json_object(data)
+    if validation: return validation
+    invalid = invalid_note_fields(data)
+    if invalid: return error_response(invalid, status=422)
     if "title" in data:
         note.title = data["title"]
     if "content" in data:
         note.content = data["content"]
     db.session.commit()
+    invalidate_notes(note_id)
     return make_response(message="Note updated")
 
 
@@ -73,4 +211,38 @@ def delete_note(note_id):
 
     db.session.delete(note)
     db.session.commit()
+    invalidate_notes(note_id)
     return make_response(message="Note deleted")
+
+
+@bp.route("/notes/bulk", methods=["POST"])
+def bulk_notes():
+    operations = request.get_json()
+    if not isinstance(operations, list):
+        return error_response("Expected a JSON array of operations")
+    if len(operations) > MAX_BULK_OPERATIONS:
+        return error_response(f"At most {MAX_BULK_OPERATIONS} operations per request")
+
+    referenced = bulk_note_ids(operations)
+    live = set(db.session.scalars(select(Note.id).where(Note.id.in_(referenced)))) if referenced else set()
+    results, creates, patches, deletes = plan_bulk_operations(operations, live)
+
+    if creates:
+        stmt = insert(Note).returning(Note.id, sort_by_parameter_order=True)
+        new_ids = db.session.scalars(stmt, [values for _, values in creates]).all()
+        for (index, _), note_id in zip(creates, new_ids):
+            results[index] = bulk_result(index, "create", 201, note_id, "Note created")
+    if patches:
+        db.session.execute(update(Note), patches)
+    if deletes:
+        stmt = delete(Note).where(Note.id.in_(deletes))
+        db.session.execute(stmt, execution_options={"synchronize_session": False})
+    db.session.commit()
+    invalidate_notes(*{p["id"] for p in patches}, *deletes)
+
+    return make_response(data=results, message="Bulk operations applied")
+
+
+@bp.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return make_response(data=get_cache().stats(), message="Cache statistics")
@@ -0,0 +1,174 @@
+"""Prefork production server for the Notes API (Unix only).
+
+The master process opens the listening socket and forks --workers processes
+that accept on it. Each worker imports the app after the fork, warms it up and
+serves requests on a fixed pool of --threads threads.
+
+Signals sent to the master:
+    SIGHUP           graceful reload: start fresh workers (new code), then retire the old ones
+    SIGTERM, SIGINT  graceful shutdown: workers finish in-flight requests and exit
+
+Usage:
+    python serve.py --port 8000 --workers 4 --threads 8
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    # Werkzeug's threaded server starts a thread per connection; this one uses a bounded pool
+    def __init__(self, *args, threads=1, **kwargs):
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="request")
+        super().__init__(*args, **kwargs)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def load_app(args):
+    sys.path.insert(0, BASE_DIR)
+    from app import create_app
+
+    config = {}
+    if args.cache is not None:
+        config["NOTES_CACHE"] = args.cache or None
+    elif args.workers > 1:
+        # An in-process cache cannot be invalidated across workers
+        config["NOTES_CACHE"] = None
+    return create_app(config)
+
+
+def warm_up(app):
+    from sqlalchemy import select
+    from database import db
+    from routes import NOTE_COLUMNS
+
+    with app.app_context():
+        db.session.execute(select(*NOTE_COLUMNS).limit(1)).all()
+        db.session.remove()
+
+
+def run_worker(sock, args):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the master decides when to stop
+    if not args.access_log:
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    app = load_app(args)
+    warm_up(app)
+    server = PooledWSGIServer(args.host, args.port, app, threads=args.threads, fd=sock.fileno())
+
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    server.serve_forever()
+    server.pool.shutdown(wait=True)  # let in-flight requests finish
+    server.server_close()
+
+
+def run_init(args):
+    # Schema setup runs once per (re)load in a short-lived child, never in the master
+    pid = os.fork()
+    if pid == 0:
+        from app import init_db
+
+        init_db(load_app(args))
+        os._exit(0)
+    _, status = os.waitpid(pid, 0)
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise SystemExit("Database initialization failed")
+
+
+def spawn(sock, args):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(sock, args)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+    return pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    parser.add_argument("--threads", type=int, default=4, help="request threads per worker")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--access-log", action="store_true", help="log every request (slower)")
+    parser.add_argument("--cache", help="NOTES_CACHE for the workers (default: disabled when --workers > 1)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BASE_DIR)
+    sock = socket.create_server((args.host, args.port), backlog=args.backlog)
+    sock.set_inheritable(True)
+    run_init(args)
+
+    state = {"reload": False, "stop": False}
+    signal.signal(signal.SIGHUP, lambda *_: state.update(reload=True))
+    signal.signal(signal.SIGTERM, lambda *_: state.update(stop=True))
+    signal.signal(signal.SIGINT, lambda *_: state.update(stop=True))
+
+    workers = {spawn(sock, args) for _ in range(args.workers)}
+    retiring = set()
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers x {args.threads} threads")
+
+    while True:
+        if state["stop"]:
+            for pid in workers | retiring:
+                os.kill(pid, signal.SIGTERM)
+            for pid in workers | retiring:
+                os.waitpid(pid, 0)
+            break
+
+        if state["reload"]:
+            state["reload"] = False
+            run_init(args)
+            retiring |= workers
+            workers = {spawn(sock, args) for _ in range(args.workers)}
+            for pid in retiring:
+                os.kill(pid, signal.SIGTERM)
+
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            pid = 0
+        if pid in retiring:
+            retiring.discard(pid)
+        elif pid in workers:
+            # A worker died unexpectedly: replace it
+            workers.discard(pid)
+            workers.add(spawn(sock, args))
+        if not pid:
+            time.sleep(0.2)
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# Run from web/NotesAPI with: python -m pytest tests
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import create_app, init_db
+from database import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'notes.db'}",
+        "INSTRUMENTATION_PROFILE_DIR": str(tmp_path / "profiles")
+        })
+    init_db(app)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def create_note(client):
+    def create(title="title", content=None):
+        response = client.post("/notes", json={"title": title, "content": content})
+        assert response.status_code == 201
+        return response.get_json()["data"]["id"]
+    return create
+
+
+@pytest.fixture
+def seed_notes(client):
+    # Create notes through /notes/bulk; returns their ids in creation order
+    def seed(count, title="note {}"):
+        operations = [{"op": "create", "title": title.format(i), "content": f"content {i}"} for i in range(count)]
+        response = client.post("/notes/bulk", json=operations)
+        assert response.status_code == 200
+        return [r["id"] for r in response.get_json()["data"]]
+    return seed
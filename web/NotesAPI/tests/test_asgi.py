@@ -0,0 +1,94 @@
+import asyncio
+import importlib
+import os
+import pytest
+
+
+@pytest.fixture(scope="module")
+def asgi(tmp_path_factory):
+    # The async engine is built at import time from the environment
+    path = tmp_path_factory.mktemp("asgi") / "notes.db"
+    os.environ["NOTES_ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    try:
+        module = importlib.import_module("asgi")
+    finally:
+        del os.environ["NOTES_ASYNC_DATABASE_URL"]
+    assert str(module.engine.url).endswith(str(path))
+    return module
+
+
+def run(asgi, scenario):
+    async def main():
+        async with asgi.app.test_app() as test_app:
+            return await scenario(test_app.test_client())
+    return asyncio.run(main())
+
+
+async def create(client, title):
+    response = await client.post("/notes", json={"title": title})
+    assert response.status_code == 201
+    return (await response.get_json())["data"]["id"]
+
+
+def test_crud_round_trip(asgi):
+    async def scenario(client):
+        note_id = await create(client, "first")
+        assert (await client.patch(f"/notes/{note_id}", json={"content": "body"})).status_code == 200
+        response = await client.get(f"/notes/{note_id}")
+        assert (await response.get_json())["data"]["content"] == "body"
+        assert (await client.delete(f"/notes/{note_id}")).status_code == 200
+        assert (await client.get(f"/notes/{note_id}")).status_code == 404
+    run(asgi, scenario)
+
+
+def test_non_object_bodies_are_rejected(asgi):
+    async def scenario(client):
+        note_id = await create(client, "keep")
+        assert (await client.post("/notes", json=["title"])).status_code == 400
+        assert (await client.put(f"/notes/{note_id}", json=[1])).status_code == 400
+        assert (await client.patch(f"/notes/{note_id}", json=[1])).status_code == 400
+    run(asgi, scenario)
+
+
+def test_bulk_partial_failure_and_boolean_ids(asgi):
+    async def scenario(client):
+        target = await create(client, "target")
+        response = await client.post("/notes/bulk", json=[
+            {"op": "create", "title": "made"},
+            {"op": "delete", "id": True},
+            {"op": "patch", "id": target, "title": "renamed"},
+            {"op": "delete", "id": 10 ** 9}
+            ])
+        results = (await response.get_json())["data"]
+        assert [r["status"] for r in results] == [201, 404, 200, 404]
+        assert (await client.get(f"/notes/{results[0]['id']}")).status_code == 200
+        renamed = await client.get(f"/notes/{target}")
+        assert (await renamed.get_json())["data"]["title"] == "renamed"
+    run(asgi, scenario)
+
+
+def test_etag_revalidation(asgi):
+    async def scenario(client):
+        note_id = await create(client, "tagged")
+        for url in (f"/notes/{note_id}", "/notes?limit=5"):
+            etag = (await client.get(url)).headers["ETag"]
+            assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 304
+
+        listing_etag = (await client.get("/notes?limit=5")).headers["ETag"]
+        await client.patch(f"/notes/{note_id}", json={"title": "retagged"})
+        response = await client.get("/notes?limit=5", headers={"If-None-Match": listing_etag})
+        assert response.status_code == 200
+    run(asgi, scenario)
+
+
+def test_search_and_stream(asgi):
+    async def scenario(client):
+        note_id = await create(client, "zeppelin voyage")
+        hits = (await (await client.get("/notes/search?q=zeppelin")).get_json())["data"]
+        assert [h["id"] for h in hits] == [note_id]
+
+        response = await client.get("/notes?stream=1")
+        assert response.mimetype == "application/x-ndjson"
+        lines = (await response.get_data(as_text=True)).splitlines()
+        assert note_id in [int(line.split('"id": ')[1].split(",")[0]) for line in lines]
+    run(asgi, scenario)
@@ -0,0 +1,78 @@
+from helpers import MAX_BULK_OPERATIONS
+
+
+def bulk(client, operations):
+    response = client.post("/notes/bulk", json=operations)
+    assert response.status_code == 200
+    return [(r["status"], r["id"]) for r in response.get_json()["data"]]
+
+
+def note_ids(client):
+    return [n["id"] for n in client.get("/notes").get_json()["data"]]
+
+
+def test_boolean_id_does_not_match_note_one(client, create_note):
+    first = create_note("one")
+    assert first == 1
+
+    results = bulk(client, [
+            {"op": "delete", "id": True},
+            {"op": "patch", "id": True, "title": "changed"},
+            {"op": "delete", "id": False}
+            ])
+
+    assert [status for status, _ in results] == [404, 404, 404]
+    assert client.get("/notes/1").get_json()["data"]["title"] == "one"
+
+
+def test_patch_with_non_object_body_is_rejected(client, create_note):
+    note_id = create_note("one")
+    response = client.patch(f"/notes/{note_id}", json=["title"])
+
+    assert response.status_code == 400
+    assert client.put(f"/notes/{note_id}", json=["title"]).status_code == 400
+    assert client.post("/notes", json=["title"]).status_code == 400
+    assert client.get(f"/notes/{note_id}").get_json()["data"]["title"] == "one"
+
+
+def test_partial_failures_are_reported_per_item(client, create_note):
+    kept, gone = create_note("kept"), create_note("gone")
+
+    response = client.post("/notes/bulk", json=[
+            {"op": "create", "title": "new", "content": "body"},
+            {"op": "create"},
+            {"op": "create", "title": None},
+            {"op": "patch", "id": kept, "content": "patched"},
+            {"op": "patch", "id": kept, "content": 5},
+            {"op": "delete", "id": gone},
+            {"op": "delete", "id": gone},
+            {"op": "patch", "id": 999},
+            "not an object",
+            {"op": "explode"}
+            ])
+
+    assert response.status_code == 200
+    results = response.get_json()["data"]
+    assert [r["index"] for r in results] == list(range(10))
+    assert [r["status"] for r in results] == [201, 400, 422, 200, 422, 200, 404, 404, 400, 400]
+
+    notes = {n["id"]: n for n in client.get("/notes").get_json()["data"]}
+    new_id = results[0]["id"]
+    assert set(notes) == {kept, new_id}
+    assert notes[kept]["content"] == "patched"
+    assert (notes[new_id]["title"], notes[new_id]["content"]) == ("new", "body")
+
+
+def test_created_ids_follow_request_order(client):
+    results = bulk(client, [{"op": "create", "title": f"n{i}"} for i in range(50)])
+    ids = [note_id for _, note_id in results]
+    assert ids == sorted(ids)
+    titles = {n["id"]: n["title"] for n in client.get("/notes").get_json()["data"]}
+    assert [titles[i] for i in ids] == [f"n{i}" for i in range(50)]
+
+
+def test_envelope_is_validated(client):
+    assert client.post("/notes/bulk", json={"op": "create"}).status_code == 400
+    too_many = [{"op": "create", "title": "x"}] * (MAX_BULK_OPERATIONS + 1)
+    assert client.post("/notes/bulk", json=too_many).status_code == 400
+    assert note_ids(client) == []
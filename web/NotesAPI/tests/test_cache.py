@@ -0,0 +1,72 @@
+def cache_stats(client):
+    return client.get("/cache/stats").get_json()["data"]
+
+
+def test_item_is_served_from_cache_until_a_write(client, create_note):
+    note_id = create_note("cached")
+    client.get(f"/notes/{note_id}")
+    before = cache_stats(client)
+
+    first = client.get(f"/notes/{note_id}")
+    assert cache_stats(client)["hits"] == before["hits"] + 1
+
+    client.patch(f"/notes/{note_id}", json={"title": "changed"})
+    second = client.get(f"/notes/{note_id}")
+    stats = cache_stats(client)
+    assert stats["hits"] == before["hits"] + 1
+    assert stats["misses"] == before["misses"] + 1
+    assert second.get_json()["data"]["title"] == "changed"
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+
+def test_deleted_note_is_not_served_from_cache(client, create_note):
+    note_id = create_note("gone")
+    client.get(f"/notes/{note_id}")
+
+    assert client.delete(f"/notes/{note_id}").status_code == 200
+    assert client.get(f"/notes/{note_id}").status_code == 404
+
+
+def test_write_invalidates_cached_page_and_its_etag(client, seed_notes):
+    seed_notes(3)
+    first = client.get("/notes?limit=10")
+    assert client.get("/notes?limit=10").get_json() == first.get_json()
+    hits = cache_stats(client)["hits"]
+
+    client.post("/notes", json={"title": "new"})
+    second = client.get("/notes?limit=10")
+    assert cache_stats(client)["hits"] == hits
+    assert len(second.get_json()["data"]) == 4
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+    stale = client.get("/notes?limit=10", headers={"If-None-Match": first.headers["ETag"]})
+    assert stale.status_code == 200
+
+
+def test_full_listing_is_not_cached(client, seed_notes):
+    seed_notes(3)
+    client.get("/notes")
+    size = cache_stats(client)["size"]
+
+    client.get("/notes")
+    assert cache_stats(client)["size"] == size
+    client.get("/notes?limit=2")
+    assert cache_stats(client)["size"] == size + 1
+
+
+def test_cache_can_be_disabled(tmp_path):
+    from app import create_app, init_db
+
+    app = create_app({
+        "TESTING": True,
+        "NOTES_CACHE": None,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'notes.db'}"
+        })
+    init_db(app)
+    client = app.test_client()
+    note_id = client.post("/notes", json={"title": "a"}).get_json()["data"]["id"]
+    client.get(f"/notes/{note_id}")
+
+    stats = cache_stats(client)
+    assert stats["backend"] == "NullCache"
+    assert stats["hits"] == 0 and stats["size"] == 0
@@ -0,0 +1,71 @@
+from database import db
+from models import Note
+
+
+def revalidate(client, url, etag):
+    return client.get(url, headers={"If-None-Match": etag})
+
+
+def test_single_note_etag_and_304(client, create_note):
+    note_id = create_note("a")
+    url = f"/notes/{note_id}"
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    cached = revalidate(client, url, etag)
+    assert cached.status_code == 304
+    assert cached.get_data() == b""
+    assert cached.headers["ETag"] == etag
+
+    client.patch(url, json={"content": "changed"})
+    fresh = revalidate(client, url, etag)
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+    assert fresh.get_json()["data"]["content"] == "changed"
+
+
+def test_weak_validator_also_matches(client, create_note):
+    url = f"/notes/{create_note('a')}"
+    etag = client.get(url).headers["ETag"]
+    assert revalidate(client, url, f"W/{etag}").status_code == 304
+    assert revalidate(client, "/notes", "W/" + client.get("/notes").headers["ETag"]).status_code == 304
+
+
+def test_listing_etag_changes_with_every_kind_of_write(client, create_note):
+    note_id = create_note("a")
+    writes = [
+            lambda: create_note("b"),
+            lambda: client.put(f"/notes/{note_id}", json={"title": "a2"}),
+            lambda: client.patch(f"/notes/{note_id}", json={"content": "x"}),
+            lambda: client.post("/notes/bulk", json=[{"op": "create", "title": "c"}]),
+            lambda: client.delete(f"/notes/{note_id}")
+            ]
+    etag = client.get("/notes").headers["ETag"]
+    for write in writes:
+        assert revalidate(client, "/notes", etag).status_code == 304
+        write()
+        response = revalidate(client, "/notes", etag)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+
+
+def test_listing_etag_follows_direct_sql_writes(app, client, create_note):
+    note_id = create_note("a")
+    etag = client.get("/notes").headers["ETag"]
+    with app.app_context():
+        db.session.execute(db.update(Note).where(Note.id == note_id).values(title="b"))
+        db.session.commit()
+
+    response = revalidate(client, "/notes", etag)
+    assert response.status_code == 200
+    assert response.get_json()["data"][0]["title"] == "b"
+
+
+def test_each_query_string_has_its_own_etag(client, seed_notes):
+    seed_notes(3)
+    full = client.get("/notes").headers["ETag"]
+    page = client.get("/notes?limit=2").headers["ETag"]
+    assert full != page
+    assert revalidate(client, "/notes?limit=2", full).status_code == 200
+    assert revalidate(client, "/notes?limit=2", page).status_code == 304
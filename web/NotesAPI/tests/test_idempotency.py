@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, update
+from database import db
+from idempotency import HEADER, MAX_KEY_LENGTH
+from models import IdempotencyKey, Note
+
+
+def post(client, body, key):
+    return client.post("/notes", json=body, headers={HEADER: key})
+
+
+def note_count(app):
+    with app.app_context():
+        return db.session.scalar(select(func.count()).select_from(Note))
+
+
+def test_repeat_replays_the_first_response(app, client):
+    first = post(client, {"title": "once"}, "key-1")
+    second = post(client, {"title": "once"}, "key-1")
+
+    assert first.status_code == second.status_code == 201
+    assert second.get_json() == first.get_json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert note_count(app) == 1
+
+
+def test_reused_key_with_a_different_body_is_rejected(app, client):
+    post(client, {"title": "one"}, "key-1")
+    response = post(client, {"title": "two"}, "key-1")
+
+    assert response.status_code == 422
+    assert note_count(app) == 1
+
+
+def test_client_errors_are_replayed_too(app, client):
+    assert post(client, {}, "key-1").status_code == 400
+    replay = post(client, {}, "key-1")
+    assert replay.status_code == 400
+    assert replay.headers["Idempotent-Replayed"] == "true"
+
+
+def test_invalid_keys(client):
+    assert post(client, {"title": "a"}, "").status_code == 400
+    assert post(client, {"title": "a"}, "k" * (MAX_KEY_LENGTH + 1)).status_code == 400
+    assert post(client, {"title": "a"}, "k" * MAX_KEY_LENGTH).status_code == 201
+
+
+def test_without_a_key_every_request_creates(app, client):
+    client.post("/notes", json={"title": "a"})
+    client.post("/notes", json={"title": "a"})
+    assert note_count(app) == 2
+
+
+def test_expired_key_runs_the_request_again(app, client):
+    post(client, {"title": "a"}, "key-1")
+    with app.app_context():
+        db.session.execute(update(IdempotencyKey).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.session.commit()
+
+    response = post(client, {"title": "a"}, "key-1")
+    assert "Idempotent-Replayed" not in response.headers
+    assert note_count(app) == 2
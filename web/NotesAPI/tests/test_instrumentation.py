@@ -0,0 +1,60 @@
+import os
+import re
+from collections import Counter
+import pytest
+from app import create_app, init_db
+from instrumentation import dump_profile
+
+
+@pytest.fixture
+def instrumented(tmp_path):
+    app = create_app({
+        "TESTING": True,
+        "INSTRUMENTATION": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'notes.db'}"
+        })
+    init_db(app)
+    return app.test_client()
+
+
+def metric(text, name, **labels):
+    wanted = ",".join(f'{k}="{v}"' for k, v in {"worker_pid": os.getpid(), **labels}.items())
+    match = re.search(rf"^{name}{{{re.escape(wanted)}}} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else None
+
+
+def test_server_timing_header(instrumented):
+    response = instrumented.post("/notes", json={"title": "timed"})
+    timing = dict(part.split(";", 1) for part in response.headers["Server-Timing"].split(", "))
+
+    assert set(timing) == {"sql", "json", "app", "total"}
+    assert re.search(r'desc="[1-9]\d* queries"', timing["sql"])
+
+
+def test_metrics_count_requests_by_route_and_status(instrumented):
+    note_id = instrumented.post("/notes", json={"title": "a"}).get_json()["data"]["id"]
+    for _ in range(3):
+        instrumented.get(f"/notes/{note_id}")
+    instrumented.get("/notes/999999")
+
+    text = instrumented.get("/metrics").get_data(as_text=True)
+    route = "/notes/<int:note_id>"
+    assert metric(text, "http_requests_total", method="GET", route=route, status=200) == 3
+    assert metric(text, "http_requests_total", method="GET", route=route, status=404) == 1
+    assert metric(text, "http_request_duration_seconds_count", method="GET", route=route) == 4
+    assert metric(text, "http_request_duration_seconds_bucket", method="GET", route=route, le="+Inf") == 4
+    assert metric(text, "db_queries_total", method="POST", route="/notes") >= 1
+    assert text.startswith(f"# Metrics of worker process {os.getpid()} only\n")
+
+
+def test_disabled_by_default(client):
+    assert "Server-Timing" not in client.get("/notes").headers
+    assert client.get("/metrics").status_code == 404
+
+
+def test_dump_profile_writes_folded_stacks(tmp_path):
+    dump_profile(str(tmp_path), "GET", "/notes/<int:note_id>", 0.25, Counter({"a;b": 3, "a;c": 1}))
+
+    [path] = tmp_path.iterdir()
+    assert path.name.endswith("-GET-notes_int-note_id-250ms.folded")
+    assert path.read_text() == "a;b 3\na;c 1\n"
@@ -0,0 +1,33 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+LOAD = Path(__file__).resolve().parent.parent / "benchmarks" / "load.py"
+
+
+def run_load(*args):
+    return subprocess.run([sys.executable, str(LOAD), *args], capture_output=True, text=True, check=True)
+
+
+def test_every_scenario_runs_without_errors(tmp_path):
+    output = tmp_path / "run.json"
+    run_load("--notes", "60", "--requests", "20", "--concurrency", "2", "--output", str(output))
+
+    report = json.loads(output.read_text())
+    assert report["meta"]["notes"] == 60 and report["meta"]["cache"] is True
+    assert set(report["results"]) >= {"list_page", "search", "create", "delete", "bulk"}
+    for name, result in report["results"].items():
+        assert result["errors"] == 0, name
+        assert result["requests"] == 20
+        assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"] <= result["max_ms"]
+
+
+def test_compare_against_previous_run(tmp_path):
+    old, new = tmp_path / "old.json", tmp_path / "new.json"
+    common = ("--notes", "20", "--requests", "5", "--scenarios", "get_one,list_page", "--no-cache")
+    run_load(*common, "--output", str(old))
+    result = run_load(*common, "--output", str(new), "--compare", str(old))
+
+    assert set(json.loads(new.read_text())["results"]) == {"get_one", "list_page"}
+    assert "get_one" in result.stdout.split("(vs")[-1]
@@ -0,0 +1,64 @@
+from database import db
+from helpers import MAX_PAGE_SIZE, encode_cursor
+from models import Note
+
+
+def get_page(client, **params):
+    response = client.get("/notes", query_string=params)
+    assert response.status_code == 200
+    body = response.get_json()
+    return [n["id"] for n in body["data"]], body["meta"]
+
+
+def test_cursor_pages_cover_every_note_once_in_order(client, seed_notes):
+    ids = seed_notes(23)
+
+    seen, meta = get_page(client, limit=10)
+    pages = [len(seen)]
+    while meta["next_cursor"]:
+        page, meta = get_page(client, limit=10, cursor=meta["next_cursor"])
+        seen += page
+        pages.append(len(page))
+
+    assert seen == ids
+    assert pages == [10, 10, 3]
+    assert meta == {"limit": 10, "next_cursor": None}
+
+
+def test_notes_added_while_paging_are_not_skipped_or_repeated(client, seed_notes, create_note):
+    ids = seed_notes(5)
+    first, meta = get_page(client, limit=3)
+    added = create_note("late")
+
+    rest, meta = get_page(client, limit=3, cursor=meta["next_cursor"])
+    assert first + rest == ids + [added]
+
+
+def test_page_size_is_capped(client, seed_notes):
+    seed_notes(MAX_PAGE_SIZE + 5)
+    page, meta = get_page(client, limit=MAX_PAGE_SIZE * 10)
+    assert len(page) == MAX_PAGE_SIZE
+    assert meta["limit"] == MAX_PAGE_SIZE
+    assert meta["next_cursor"]
+
+
+def test_without_limit_or_cursor_every_note_is_returned(client, seed_notes):
+    ids = seed_notes(7)
+    response = client.get("/notes")
+    assert [n["id"] for n in response.get_json()["data"]] == ids
+    assert "meta" not in response.get_json()
+
+
+def test_invalid_limit_and_cursor_are_rejected(client, seed_notes):
+    seed_notes(2)
+    for params in ({"limit": "0"}, {"limit": "-3"}, {"limit": "ten"}, {"cursor": "!!!"}, {"cursor": "bm90LWEtY3Vyc29y"}):
+        assert client.get("/notes", query_string=params).status_code == 400, params
+
+
+def test_cursor_encodes_created_at_and_id(client, app, create_note):
+    note_id = create_note("a")
+    with app.app_context():
+        note = db.session.get(Note, note_id)
+        cursor = encode_cursor(note)
+    page, _ = get_page(client, limit=5, cursor=cursor)
+    assert page == []
@@ -0,0 +1,83 @@
+from database import db
+from models import Note
+
+
+def search(client, q, **params):
+    response = client.get("/notes/search", query_string={"q": q, **params})
+    assert response.status_code == 200
+    return response.get_json()["data"]
+
+
+def test_matches_title_and_content_with_prefix_on_last_word(client, create_note):
+    by_title = create_note("Groceries list", "milk")
+    by_content = create_note("Todo", "buy more groceries")
+    create_note("Unrelated", "nothing here")
+
+    hits = search(client, "grocer")
+    assert {h["id"] for h in hits} == {by_title, by_content}
+    assert any("<mark>" in h["snippet"] for h in hits)
+    assert all(isinstance(h["rank"], float) for h in hits)
+
+
+def test_title_hit_ranks_above_passing_mention(client, create_note):
+    passing = create_note("Notes", "a long text that mentions kayak once among many other words")
+    focused = create_note("Kayak", "kayak trip, kayak rental")
+
+    assert [h["id"] for h in search(client, "kayak")] == [focused, passing]
+
+
+def test_index_follows_update_and_delete(client, create_note):
+    note_id = create_note("Old title", "apples")
+    other = create_note("Keep", "apples too")
+
+    client.patch(f"/notes/{note_id}", json={"title": "New title", "content": "pears"})
+    assert [h["id"] for h in search(client, "apples")] == [other]
+    assert [h["id"] for h in search(client, "pears")] == [note_id]
+    assert search(client, "old") == []
+
+    client.put(f"/notes/{other}", json={"title": "Replaced"})
+    assert search(client, "apples") == []
+
+    client.delete(f"/notes/{note_id}")
+    assert search(client, "pears") == []
+    assert [h["id"] for h in search(client, "replaced")] == [other]
+
+
+def test_index_follows_bulk_writes(client, create_note):
+    patched, deleted = create_note("alpha"), create_note("alpha beta")
+    client.post("/notes/bulk", json=[
+            {"op": "create", "title": "alpha gamma"},
+            {"op": "patch", "id": patched, "title": "omega"},
+            {"op": "delete", "id": deleted}
+            ])
+
+    assert [h["title"] for h in search(client, "alpha")] == ["alpha gamma"]
+    assert [h["id"] for h in search(client, "omega")] == [patched]
+
+
+def test_index_follows_direct_sql_writes(app, client, create_note):
+    note_id = create_note("before")
+    with app.app_context():
+        db.session.execute(db.update(Note).where(Note.id == note_id).values(title="after"))
+        db.session.commit()
+
+    assert search(client, "before") == []
+    assert [h["id"] for h in search(client, "after")] == [note_id]
+
+
+def test_user_input_cannot_break_the_match_syntax(client, create_note):
+    note_id = create_note('quote " and AND OR NOT ( stuff')
+    for q in ['"', "AND", "(", "NOT stuff", 'quote "']:
+        assert client.get("/notes/search", query_string={"q": q}).status_code == 200
+    assert [h["id"] for h in search(client, "stuff")] == [note_id]
+
+
+def test_missing_query_and_bad_limit(client):
+    assert client.get("/notes/search").status_code == 400
+    assert client.get("/notes/search?q=%20%20").status_code == 400
+    assert client.get("/notes/search?q=x&limit=0").status_code == 400
+
+
+def test_limit(client, seed_notes):
+    seed_notes(10, title="same word {}")
+    assert len(search(client, "same", limit=3)) == 3
@@ -0,0 +1,47 @@
+import json
+from datetime import datetime, timezone
+import pytest
+from flask.json.provider import DefaultJSONProvider
+import json_provider
+from database import db
+from helpers import serialize_note, serialize_note_rows
+from models import Note
+from routes import NOTE_COLUMNS
+
+PAYLOAD = {
+        "text": "café ☃",
+        "when": datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+        "items": [1, 2.5, None, True],
+        "nested": {"b": 1, "a": 2}
+        }
+
+
+@pytest.mark.parametrize("encoder", ["orjson", "stdlib"])
+def test_provider_matches_flask_default(app, monkeypatch, encoder):
+    if encoder == "stdlib":
+        monkeypatch.setattr(json_provider, "orjson", None)
+    elif json_provider.orjson is None:
+        pytest.skip("orjson is not installed")
+
+    with app.test_request_context():
+        fast = app.json.response(PAYLOAD)
+        default = DefaultJSONProvider(app).response(PAYLOAD)
+
+    assert fast.mimetype == "application/json"
+    assert json.loads(fast.get_data()) == json.loads(default.get_data())
+    assert json.loads(fast.get_data())["when"] == "Wed, 01 May 2024 12:30:00 GMT"
+
+
+def test_row_serializer_matches_model_serializer(app, seed_notes):
+    seed_notes(5)
+    with app.app_context():
+        notes = Note.query.order_by(Note.id).all()
+        rows = db.session.execute(db.select(*NOTE_COLUMNS).order_by(Note.id)).all()
+        assert serialize_note_rows(rows) == [serialize_note(n) for n in notes]
+
+
+def test_listing_and_item_agree(client, seed_notes):
+    ids = seed_notes(3)
+    listing = client.get("/notes").get_json()["data"]
+    items = [client.get(f"/notes/{i}").get_json()["data"] for i in ids]
+    assert listing == items
@@ -0,0 +1,37 @@
+from sqlalchemy import text
+from app import create_app
+from database import db
+from sqlite_profile import DEFAULT_POOL_OPTIONS, is_file_sqlite, sqlite_engine_options
+
+
+def pragma(app, name):
+    with app.app_context():
+        return db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_default_pragmas_are_applied(app):
+    assert pragma(app, "journal_mode") == "wal"
+    assert pragma(app, "synchronous") == 1  # NORMAL
+    assert pragma(app, "busy_timeout") == 5000
+    assert pragma(app, "temp_store") == 2  # MEMORY
+
+
+def test_config_overrides_default_pragmas(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'notes.db'}",
+        "SQLITE_PRAGMAS": {"busy_timeout": 250, "synchronous": "FULL"}
+        })
+    assert pragma(app, "busy_timeout") == 250
+    assert pragma(app, "synchronous") == 2  # FULL
+    assert pragma(app, "journal_mode") == "wal"
+
+
+def test_pool_options_only_for_file_databases(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'notes.db'}"
+    assert is_file_sqlite(uri)
+    assert sqlite_engine_options(uri)["pool_size"] == DEFAULT_POOL_OPTIONS["pool_size"]
+    assert sqlite_engine_options(uri, pool_size=2)["pool_size"] == 2
+
+    for memory in ("sqlite://", "sqlite:///:memory:"):
+        assert not is_file_sqlite(memory)
+        assert sqlite_engine_options(memory) == {}
@@ -0,0 +1,30 @@
+import json
+
+from helpers import STREAM_BATCH_SIZE
+
+
+def test_stream_returns_one_json_note_per_line_in_order(client, seed_notes):
+    ids = seed_notes(STREAM_BATCH_SIZE + 3)   # More than one fetch batch
+
+    response = client.get("/notes?stream=1")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.get_data(as_text=True).splitlines()
+    notes = [json.loads(line) for line in lines]
+    assert [n["id"] for n in notes] == ids
+    assert set(notes[0]) == {"id", "title", "content", "created_at"}
+    assert notes[0]["title"] == "note 0"
+
+
+def test_stream_of_empty_collection_is_empty(client):
+    response = client.get("/notes?stream=true")
+    assert response.status_code == 200
+    assert response.get_data() == b""
+
+
+def test_stream_matches_the_json_listing(client, seed_notes):
+    seed_notes(5)
+    listing = client.get("/notes").get_json()["data"]
+    streamed = [json.loads(line) for line in client.get("/notes?stream=1").get_data(as_text=True).splitlines()]
+    assert streamed == listing
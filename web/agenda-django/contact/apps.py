@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ContactConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'contact'
+
+    def ready(self):
+        # Register the search index signals and create the index table after migrate
+        from contact import search, signals  # noqa: F401
+        post_migrate.connect(search.create_search_table, sender=self)
@@ -0,0 +1,113 @@
+# Denormalized contact counts
+#
+# Category.contact_count and UserContactCount.count hold the number of visible
+# contacts per category and per user, so list pages show totals without a
+# COUNT(*) (or one per category) on every request. The Contact signals in
+# contact/signals.py move a contact between counters when it is created,
+# deleted, hidden/shown or moved to another category or user.
+#
+# Counters that are missing (users/categories that existed before, or rows
+# written with bulk_create()/update()) are computed on first read;
+# python manage.py recount_contacts recomputes all of them.
+
+from django.db.models import Count, F
+from contact.models import Category, Contact, UserContactCount
+
+
+# Contact fields the counters depend on
+COUNTED_FIELDS = ('show', 'user_id', 'category_id')
+UNKNOWN = object()
+
+
+def counted_as(contact):
+    # The (user, category) a contact is counted under, None when it is hidden,
+    # or UNKNOWN when those fields were not loaded (.only()/.defer())
+    if any(field not in contact.__dict__ for field in COUNTED_FIELDS):
+        return UNKNOWN
+    if not contact.show:
+        return None
+    return contact.user_id, contact.category_id
+
+
+def move(old, new):
+    # Apply a contact's change from one counted_as() state to another
+    if old == new:
+        return
+    for state, delta in ((old, -1), (new, 1)):
+        if state is None:
+            continue
+        user_id, category_id = state
+        if user_id is not None:
+            add_to_user(user_id, delta)
+        if category_id is not None:
+            # NULL (not counted yet) stays NULL and is computed on the next read
+            Category.objects.filter(pk=category_id).update(contact_count=F('contact_count') + delta)
+
+
+def add_to_user(user_id, delta):
+    if UserContactCount.objects.filter(user_id=user_id).update(count=F('count') + delta) or delta < 0:
+        return  # (a missing counter is computed on first read; never create one while
+                # contacts are removed, e.g. while the user itself is being deleted)
+    # No counter yet: start from a real count (which already includes this change)
+    _, created = UserContactCount.objects.get_or_create(
+        user_id=user_id, defaults={'count': visible_contacts(user_id)}
+    )
+    if not created:
+        # Created concurrently in the meantime
+        UserContactCount.objects.filter(user_id=user_id).update(count=F('count') + delta)
+
+
+def visible_contacts(user_id):
+    return Contact.objects.filter(user_id=user_id, show=True).count()
+
+
+def user_contact_count(user):
+    # Number of visible contacts of a user (one primary-key lookup)
+    counter = UserContactCount.objects.filter(user=user).first()
+    if counter is not None:
+        return counter.count
+    counter, _ = UserContactCount.objects.get_or_create(
+        user=user, defaults={'count': visible_contacts(user.pk)}
+    )
+    return counter.count
+
+
+def with_contact_counts(categories):
+    # Evaluate a category queryset, filling contact_count where it was never
+    # computed (one grouped query for all of them, then stored)
+    categories = list(categories)
+    missing = [category for category in categories if category.contact_count is None]
+    if missing:
+        counts = dict(
+            Contact.objects.filter(category__in=missing, show=True)
+            .values_list('category').annotate(n=Count('id')).order_by()
+        )
+        for category in missing:
+            category.contact_count = counts.get(category.pk, 0)
+            Category.objects.filter(pk=category.pk, contact_count__isnull=True).update(
+                contact_count=category.contact_count
+            )
+    return categories
+
+
+def recount_all():
+    # Recompute every counter from the contact table
+    categories = dict(
+        Contact.objects.filter(show=True, category__isnull=False)
+        .values_list('category').annotate(n=Count('id')).order_by()
+    )
+    users = dict(
+        Contact.objects.filter(show=True, user__isnull=False)
+        .values_list('user').annotate(n=Count('id')).order_by()
+    )
+    updated = []
+    for category in Category.objects.only('pk', 'contact_count'):
+        category.contact_count = categories.get(category.pk, 0)
+        updated.append(category)
+    Category.objects.bulk_update(updated, ['contact_count'], batch_size=1000)
+    UserContactCount.objects.exclude(user__in=list(users)).delete()
+    UserContactCount.objects.bulk_create(
+        [UserContactCount(user_id=user_id, count=count) for user_id, count in users.items()],
+        update_conflicts=True, unique_fields=['user'], update_fields=['count'],
+    )
+    return len(updated), len(users)
@@ -0,0 +1,145 @@
+# Check that every contact view is served by indexes
+#
+# Requests each GET route of contact/urls.py as a logged-in user, captures the
+# SQL the view runs and prints SQLite's EXPLAIN QUERY PLAN for every SELECT.
+# Full table scans and temporary sort B-trees are flagged and make the command
+# fail, so a new view (or a changed queryset) cannot silently lose its index.
+#
+# Every request runs inside a transaction that is rolled back, so views that
+# change data on GET (e.g. delete) leave the database untouched.
+#
+#     python manage.py audit_query_plans [--user USERNAME] [--verbose]
+
+import re
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from contact import urls
+from contact.models import Category, Contact
+from contact.pagination import encode_cursor
+
+# Query strings to try for each route (the default is a single plain request)
+# (cursors only need a plausible sort key, not an existing row)
+SAMPLE_PARAMS = {
+    'contacts': [{}, {'after': encode_cursor(['m', 0])}, {'before': encode_cursor(['m', 0])}, {'last': '1'}],
+    'search': [
+        {'q': 'jo'}, {'q': 'jo sm'}, {'q': '555'},
+        {'q': 'jo', 'after': encode_cursor([-1.0, 0, 5])}, {'q': 'jo', 'last': '1'},
+    ],
+}
+
+# Routes that do not query contacts (or need a POST to do anything)
+SKIPPED = {'logout_view'}
+
+# "SCAN table" without an index is a full table scan; virtual tables (the FTS5
+# search index) report SCAN for their own index lookups
+FULL_SCAN = re.compile(r'^SCAN (\w+)(?! USING)(?!.*VIRTUAL TABLE)')
+TEMP_SORT = 'USE TEMP B-TREE'
+# A sort is fine when the outer loop is bounded: a list of primary keys (one page
+# loaded by id) or an FTS5 match (ranking has to sort the matches)
+BOUNDED = re.compile(r'\browid=\?|VIRTUAL TABLE')
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN QUERY PLAN for the queries of every contact view and flag full scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='username to run the views as (default: the user with most contacts)')
+        parser.add_argument('--verbose', action='store_true', help='print every plan, not only the flagged ones')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('audit_query_plans reads SQLite query plans')
+
+        user = self.get_user(options['user'])
+        problems = 0
+        with transaction.atomic():
+            client = Client(HTTP_HOST=self.host())
+            client.force_login(user)
+            for name, path, params in self.requests(user):
+                for sql in self.capture(client, path, params):
+                    plan = [row[3] for row in self.explain(sql)]
+                    flags = self.flag(plan)
+                    problems += bool(flags)
+                    if flags or options['verbose']:
+                        self.report(name, params, sql, plan, flags)
+            transaction.set_rollback(True)
+
+        if problems:
+            raise CommandError(f'{problems} queries are not fully served by indexes')
+        self.stdout.write(self.style.SUCCESS('All view queries use indexes'))
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'No user named {username!r}')
+        user = User.objects.annotate(n=Count('contacts')).order_by('-n').first()
+        if user is None:
+            raise CommandError('Create a user with some contacts first')
+        return user
+
+    def host(self):
+        # A Host header the views accept: with DEBUG off, 'localhost' is refused
+        # (400 DisallowedHost) unless it is listed in ALLOWED_HOSTS
+        for host in settings.ALLOWED_HOSTS:
+            if host != '*':
+                return host.lstrip('.')
+        return 'localhost'
+
+    def requests(self, user):
+        # (route name, path, query params) for every GET route, with ids of the user's own objects
+        ids = {
+            'contact_id': Contact.objects.filter(user=user, show=True).values_list('pk', flat=True).first(),
+            'category_id': Category.objects.filter(user=user).values_list('pk', flat=True).first(),
+        }
+        for pattern in urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or pattern.name in SKIPPED:
+                continue
+            kwargs = {arg: ids[arg] for arg in pattern.pattern.converters}
+            if None in kwargs.values():
+                self.stderr.write(f'Skipping {pattern.name}: the user has no object for {kwargs}')
+                continue
+            path = reverse(f'{urls.app_name}:{pattern.name}', kwargs=kwargs)
+            for params in SAMPLE_PARAMS.get(pattern.name, [{}]):
+                yield pattern.name, path, params
+
+    def capture(self, client, path, params):
+        # SELECTs run while serving one request (in a savepoint that is rolled back)
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            response = client.get(path, params)
+            transaction.set_rollback(True)
+        # An error page runs none of the view's queries: auditing it would prove nothing
+        if response.status_code >= 400:
+            raise CommandError(f'GET {path} {params or ""} answered {response.status_code}')
+        return [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].lstrip().upper().startswith(('SELECT', 'WITH'))
+        ]
+
+    def flag(self, plan):
+        # Plan lines that mean the query reads more rows than it returns
+        bounded = bool(plan) and BOUNDED.search(plan[0])
+        return [
+            line for line in plan
+            if FULL_SCAN.match(line) or (TEMP_SORT in line and not bounded)
+        ]
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return cursor.fetchall()
+
+    def report(self, name, params, sql, plan, flags):
+        style = self.style.ERROR if flags else self.style.SUCCESS
+        self.stdout.write(style(f'{name} {params or ""}'))
+        self.stdout.write(f'  {sql}')
+        for line in plan:
+            marker = '!!' if line in flags else '  '
+            self.stdout.write(f'  {marker} {line}')
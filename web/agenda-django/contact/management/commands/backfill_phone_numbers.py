@@ -0,0 +1,35 @@
+# Fill Contact.phone_normalized / phone_reversed for existing rows
+#
+# save() keeps them in sync from now on; this is for contacts created before
+# the columns existed, and for changes that bypass save() (bulk_create(),
+# queryset.update()).
+
+from django.core.management.base import BaseCommand
+from contact.models import Contact
+
+
+class Command(BaseCommand):
+    help = 'Fill the normalized phone columns of contacts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        contacts = Contact.objects.only('phone', 'phone_normalized', 'phone_reversed').order_by('pk')
+        updated = 0
+        batch = []
+        for contact in contacts.iterator(chunk_size=batch_size):
+            if contact.normalize_phone():
+                batch.append(contact)
+            if len(batch) == batch_size:
+                updated += self.flush(batch)
+        updated += self.flush(batch)
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} contacts'))
+
+    def flush(self, batch):
+        count = len(batch)
+        if batch:
+            Contact.objects.bulk_update(batch, ['phone_normalized', 'phone_reversed'])
+            batch.clear()
+        return count
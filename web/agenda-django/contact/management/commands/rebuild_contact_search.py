@@ -0,0 +1,17 @@
+# Rebuild the contact full-text search index from scratch
+#
+# Needed after changes that bypass model signals, e.g. bulk_create() in
+# utils/create_contacts.py or queryset.update().
+
+from django.core.management.base import BaseCommand, CommandError
+from contact import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for contacts (SQLite only)'
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('The contact search index needs a SQLite database')
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} contacts'))
@@ -0,0 +1,17 @@
+# Recompute the denormalized contact counters (see contact/counters.py)
+#
+# Needed after changes that bypass model signals, e.g. bulk_create() in
+# utils/create_contacts.py or queryset.update().
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from contact import counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-user and per-category contact counts'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            categories, users = counters.recount_all()
+        self.stdout.write(self.style.SUCCESS(f'Recounted {categories} categories and {users} users'))
@@ -1,3 +1,4 @@
+import re
 from datetime import timezone
 from django.db import models
 from django.utils import timezone
@@ -15,6 +16,10 @@ class Category(models.Model):
         null=True,                      # Optional field
         blank=True                      # Optional in forms
     )
+    contact_count = models.PositiveIntegerField(  # Visible contacts in this category, kept by contact/counters.py
+        null=True,                      # NULL = not counted yet (filled on first read)
+        editable=False
+    )
 
     def __str__(self) -> str:
         return self.category_name       # String representation of the category
@@ -24,11 +29,44 @@ class Category(models.Model):
         verbose_name_plural = 'Categories'  # Plural name in Django Admin
 
 
+def normalize_phone(phone):
+    # Digits-only, E.164-style form of a phone number: "+1 (555) 123-4567" -> "15551234567"
+    digits = re.sub(r'\D', '', phone or '')
+    if digits.startswith('00'):
+        digits = digits[2:]  # "00" international prefix, same as a leading "+"
+    return digits
+
+
+class ContactQuerySet(models.QuerySet):
+    # Phone lookups that use the (user, phone_normalized) and (user, phone_reversed)
+    # indexes instead of substring-matching the formatted phone column
+    def phone_exact(self, phone):
+        return self.filter(phone_normalized=normalize_phone(phone))
+
+    def phone_suffix(self, phone):
+        # Numbers ending with the given digits (caller ID: the caller's number may
+        # carry a country code the stored one lacks, or the other way round).
+        # A prefix range on the reversed digits, so the index is used on any database.
+        reversed_digits = normalize_phone(phone)[::-1]
+        if not reversed_digits:
+            return self.none()
+        return self.filter(
+            phone_reversed__gte=reversed_digits,
+            phone_reversed__lt=reversed_digits + ':',  # ':' sorts right after '9'
+        )
+
+
 # Contact Model
 class Contact(models.Model):
     first_name = models.CharField(max_length=30)      # First name of contact
     last_name = models.CharField(max_length=30)       # Last name of contact
     phone = models.CharField(max_length=20)           # Phone number
+    phone_normalized = models.CharField(              # Digits-only phone, kept in sync by save()
+        max_length=20, blank=True, editable=False
+    )
+    phone_reversed = models.CharField(                # phone_normalized reversed, for suffix lookups
+        max_length=20, blank=True, editable=False
+    )
     email = models.EmailField(blank=True, max_length=254)  # Optional email
     created_date = models.DateTimeField(default=timezone.now)  # Auto timestamp on creation
     description = models.TextField(blank=True)        # Optional description
@@ -52,7 +90,62 @@ class Contact(models.Model):
         blank=True
     )
 
+    objects = ContactQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Contact lists: the user's visible contacts ordered by name (contacts) or
+            # newest first (search fallback). Partial indexes, because Django writes
+            # show=True as a bare WHERE "show", which SQLite can only match to an
+            # index condition, not to an index column.
+            models.Index(
+                fields=['user', 'first_name', 'id'], condition=models.Q(show=True),
+                name='contact_user_name_idx',
+            ),
+            models.Index(
+                fields=['user', '-id'], condition=models.Q(show=True),
+                name='contact_user_newest_idx',
+            ),
+            # Visible contacts of one category (contacts_by_category)
+            models.Index(
+                fields=['category', 'user'], condition=models.Q(show=True),
+                name='contact_category_user_idx',
+            ),
+            # Phone lookups (ContactQuerySet.phone_exact / phone_suffix)
+            models.Index(fields=['user', 'phone_normalized'], name='contact_user_phone_idx'),
+            models.Index(fields=['user', 'phone_reversed'], name='contact_user_phone_rev_idx'),
+        ]
+        # Run "python manage.py audit_query_plans" after changing views or indexes
+
     def __str__(self) -> str:
         # String representation combining first and last name
         return f'{self.first_name} {self.last_name}'
 
+    def normalize_phone(self):
+        # Refresh the phone shadow columns; returns True if they changed
+        normalized = normalize_phone(self.phone)
+        changed = (self.phone_normalized, self.phone_reversed) != (normalized, normalized[::-1])
+        self.phone_normalized = normalized
+        self.phone_reversed = normalized[::-1]
+        return changed
+
+    def save(self, *args, **kwargs):
+        self.normalize_phone()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_normalized', 'phone_reversed'}
+        super().save(*args, **kwargs)
+
+
+# Number of visible contacts per user, kept by contact/counters.py
+class UserContactCount(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='contact_count'
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f'{self.user}: {self.count}'
@@ -0,0 +1,187 @@
+# Keyset ("cursor") pagination for contact lists
+#
+# Django's Paginator runs COUNT(*) and then LIMIT/OFFSET, so page N reads and
+# throws away N * per_page rows. Here a page starts right after (or before) the
+# sort key of the last (or first) row the user saw: WHERE (first_name, id) > (...)
+# ORDER BY first_name, id LIMIT n, which is an index seek whatever the depth.
+# The links carry that key as an opaque cursor (?after=... / ?before=...);
+# there are no page numbers, and the total is optional (and cached).
+
+import base64
+import binascii
+import hashlib
+import json
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+COUNT_TIMEOUT = 300  # seconds a cached total may lag behind writes that skip signals
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    # Sort key from a cursor, or None for a missing or tampered one (-> first page)
+    if not token:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (binascii.Error, ValueError):
+        return None
+    return key if isinstance(key, list) else None
+
+
+class QuerySetKeyset:
+    # Keyset access to a queryset ordered by `ordering` (which must end with a unique field)
+    def __init__(self, queryset, ordering):
+        self.ordering = list(ordering)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        self.queryset = queryset
+
+    def clean_key(self, key):
+        # Key from a cursor converted to the ordering fields' types, or None if it does not fit
+        # (a cursor is user input: ["a", "x"] must not reach id > 'x')
+        if len(key) != len(self.fields):
+            return None
+        cleaned = []
+        for name, value in zip(self.fields, key):
+            if value is None or isinstance(value, (list, dict)):
+                return None
+            try:
+                cleaned.append(self.queryset.model._meta.get_field(name).to_python(value))
+            except ValidationError:
+                return None
+        return cleaned
+
+    def keyset_slice(self, key, backward, limit):
+        # Up to `limit` (key, object) pairs following `key` in sort order (preceding it
+        # when backward), closest first; key=None starts at the beginning (or the end)
+        ordering = [self.reverse(name) for name in self.ordering] if backward else self.ordering
+        queryset = self.queryset.order_by(*ordering)
+        if key is not None:
+            queryset = queryset.filter(self.after(key, backward))
+        return [(self.key(obj), obj) for obj in queryset[:limit]]
+
+    def count(self):
+        return self.queryset.count()
+
+    def after(self, key, backward):
+        # Rows past `key` in sort order. For (a, b) > (x, y) this builds
+        # a >= x AND (a > x OR (a = x AND b > y)); the leading range lets the index seek.
+        last = len(self.fields) - 1
+        condition = Q(**{f'{self.fields[last]}__{self.lookup(last, backward)}': key[last]})
+        for i in reversed(range(last)):
+            condition = (
+                Q(**{f'{self.fields[i]}__{self.lookup(i, backward)}': key[i]})
+                | (Q(**{self.fields[i]: key[i]}) & condition)
+            )
+        if last:
+            condition &= Q(**{f'{self.fields[0]}__{self.lookup(0, backward)}e': key[0]})
+        return condition
+
+    def lookup(self, i, backward):
+        descending = self.ordering[i].startswith('-')
+        return 'lt' if descending != backward else 'gt'
+
+    def key(self, obj):
+        return [getattr(obj, field) for field in self.fields]
+
+    @staticmethod
+    def reverse(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+
+class KeysetPage:
+    def __init__(self, paginator, object_list, next_key, previous_key):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.next_cursor = encode_cursor(next_key) if next_key is not None else None
+        self.previous_cursor = encode_cursor(previous_key) if previous_key is not None else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    # object_list is a queryset (paged by `ordering`) or any object with
+    # keyset_slice(key, backward, limit) and clean_key(key) methods, like
+    # contact.search.ContactSearch.
+    # count: optional total, an int or a callable that is only run if the template asks.
+    def __init__(self, object_list, per_page, ordering=None, count=None):
+        if ordering is not None:
+            object_list = QuerySetKeyset(object_list, ordering)
+        self.source = object_list
+        self.per_page = per_page
+        self._count = count
+
+    @property
+    def count(self):
+        if callable(self._count):
+            self._count = self._count()
+        return self._count
+
+    def get_page(self, params):
+        # Page for the request's query parameters: ?after=<cursor>, ?before=<cursor>,
+        # ?last=1, or nothing for the first page
+        before = self.cursor_key(params.get('before'))
+        if before is not None or params.get('last'):
+            return self.page(before, backward=True)
+        return self.page(self.cursor_key(params.get('after')), backward=False)
+
+    def cursor_key(self, token):
+        # Validated sort key of a cursor; None (-> first or last page) if missing or tampered
+        key = decode_cursor(token)
+        return self.source.clean_key(key) if key is not None else None
+
+    def page(self, key, backward):
+        # One extra row tells whether there is another page beyond this one
+        rows = self.source.keyset_slice(key, backward, self.per_page + 1)
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backward:
+            rows.reverse()
+        if not rows:
+            # Stepped past either end (e.g. the rest was deleted): start over
+            return self.page(None, backward=False) if key is not None else KeysetPage(self, [], None, None)
+
+        first, last = rows[0][0], rows[-1][0]
+        if backward:
+            next_key = last if key is not None else None
+            previous_key = first if more else None
+        else:
+            next_key = last if more else None
+            previous_key = first if key is not None else None
+        return KeysetPage(self, [obj for _, obj in rows], next_key, previous_key)
+
+
+def count_version(user_id):
+    return cache.get_or_set(f'contact_count_version:{user_id}', 0, None)
+
+
+def bump_count_version(user_id):
+    # Invalidate every cached total of a user (called when their contacts change)
+    try:
+        cache.incr(f'contact_count_version:{user_id}')
+    except ValueError:
+        pass  # nothing cached yet
+
+
+def cached_count(user_id, name, compute):
+    # Total for one of a user's lists, cached until their contacts change
+    digest = hashlib.sha1(name.encode()).hexdigest()  # names may hold raw search input
+    key = f'contact_count:{user_id}:{count_version(user_id)}:{digest}'
+    return cache.get_or_set(key, compute, COUNT_TIMEOUT)
@@ -0,0 +1,241 @@
+# Full-text search index for contacts (SQLite FTS5)
+#
+# contact_search holds one row per visible contact (rowid = contact id) with its
+# searchable fields. Every row also carries an "owner" token (u<user id>), so a
+# search is scoped to one user inside the index itself: FTS5 intersects the
+# owner's posting list with the query terms instead of scanning the table.
+# The index is kept in sync by the Contact signals in contact/signals.py and
+# can be rebuilt with: python manage.py rebuild_contact_search
+
+import re
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, When
+from contact.pagination import QuerySetKeyset
+
+SEARCH_TABLE = 'contact_search'
+
+# prefix='2 3' adds prefix indexes so "jo*" style queries do not scan the whole term list
+CREATE_SEARCH_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        first_name, last_name, phone, phone_digits, email, owner,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+"""
+
+# bm25 column weights: names matter most, then email, then phone
+RANK = f'bm25({SEARCH_TABLE}, 10.0, 8.0, 2.0, 2.0, 4.0, 0.0)'
+
+INSERT_ROW = (
+    f'INSERT INTO {SEARCH_TABLE} (rowid, first_name, last_name, phone, phone_digits, email, owner) '
+    'VALUES (%s, %s, %s, %s, %s, %s, %s)'
+)
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Shortest run of digits that is matched anywhere inside a phone number
+MIN_PHONE_DIGITS = 3
+
+
+def is_available():
+    # FTS5 is only used on SQLite; other databases fall back to icontains filters
+    return connection.vendor == 'sqlite'
+
+
+def create_search_table(**kwargs):
+    # Create the virtual table if needed (connected to post_migrate)
+    if is_available():
+        with connection.cursor() as cursor:
+            cursor.execute(CREATE_SEARCH_TABLE)
+
+
+def owner_token(user_id):
+    return f'u{user_id}'
+
+
+def digits_only(value):
+    return re.sub(r'\D', '', value or '')
+
+
+def phone_suffixes(phone):
+    # "+1 (555) 123-4567" -> "15551234567 5551234567 ... 567": a prefix query on
+    # these tokens matches any run of digits, whatever the phone's formatting
+    digits = digits_only(phone)
+    return ' '.join(digits[i:] for i in range(max(len(digits) - MIN_PHONE_DIGITS, 0) + 1))
+
+
+def index_contact(contact):
+    # Insert or refresh a contact's row; hidden or ownerless contacts are not searchable
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [contact.pk])
+        if contact.show and contact.user_id:
+            cursor.execute(INSERT_ROW, [
+                contact.pk, contact.first_name, contact.last_name, contact.phone,
+                phone_suffixes(contact.phone), contact.email, owner_token(contact.user_id),
+            ])
+
+
+def remove_contact(contact_id):
+    if is_available():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [contact_id])
+
+
+def rebuild_index(batch_size=2000):
+    # Drop and refill the whole index from the contact table (returns the number of rows)
+    from contact.models import Contact
+    rows = Contact.objects.filter(show=True, user__isnull=False).values_list(
+        'pk', 'first_name', 'last_name', 'phone', 'email', 'user_id'
+    )
+    count = 0
+    # One transaction: much faster than committing every batch, and searches
+    # keep seeing the old index until the new one is complete
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+        cursor.execute(CREATE_SEARCH_TABLE)
+        batch = []
+        for pk, first_name, last_name, phone, email, user_id in rows.iterator(chunk_size=batch_size):
+            batch.append((pk, first_name, last_name, phone, phone_suffixes(phone), email, owner_token(user_id)))
+            if len(batch) == batch_size:
+                cursor.executemany(INSERT_ROW, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(INSERT_ROW, batch)
+            count += len(batch)
+    return count
+
+
+def build_match_query(user_id, text):
+    # Turn user input into an FTS5 query: every word must match as a prefix of a
+    # word in a name, phone or email column; input made only of numbers (a phone
+    # number in any format) also matches anywhere in the phone digits.
+    # Returns None when the input has nothing searchable.
+    tokens = TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return None
+    words = ' AND '.join(f'"{token}"*' for token in tokens)
+    query = f'{{first_name last_name phone email}} : ({words})'
+    digits = ''.join(tokens)
+    if digits.isdigit() and len(digits) >= MIN_PHONE_DIGITS:
+        query = f'{query} OR phone_digits : "{digits}"*'
+    return f'owner : "{owner_token(user_id)}" AND ({query})'
+
+
+class ContactSearch:
+    # Lazy result set for contact.pagination.KeysetPaginator: count() and each
+    # page are single FTS5 queries, and only the contacts of the page are loaded.
+    def __init__(self, user, text):
+        self.match = build_match_query(user.pk, text)
+        self.user = user
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            if self.match is None:
+                self._count = 0
+            else:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'SELECT count(*) FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [self.match])
+                    self._count = cursor.fetchone()[0]
+        return self._count
+
+    def clean_key(self, key):
+        # A cursor key must be [score, id, position]; anything else (tampered cursor) is refused
+        if len(key) != 3:
+            return None
+        score, pk, position = key
+        if isinstance(score, bool) or not isinstance(score, (int, float)):
+            return None
+        if any(isinstance(v, bool) or not isinstance(v, int) for v in (pk, position)) or position < 0:
+            return None
+        return [score, pk, position]
+
+    def keyset_slice(self, key, backward, limit):
+        # [score, id, position] keys and contacts after `key` in rank order (before it when backward).
+        # bm25 scores depend on the whole index, so any write (by any user) shifts them and
+        # the score in an old cursor no longer splits the results where it did: the cursor's
+        # row is re-scored and the page continues from its current rank. When that row is
+        # gone (deleted, hidden, edited) the page is cut at its position instead (OFFSET),
+        # which is exact unless other rows moved too.
+        if self.match is None:
+            return []
+        current = self.score_of(key[1]) if key is not None else None
+        if key is None:
+            rows = self.ranked(backward, limit)
+            start = self.count() - 1 if backward else 0
+        elif current is not None:
+            rows = self.ranked(backward, limit, after=[current, key[1]])
+            start = key[2] - 1 if backward else key[2] + 1
+        elif backward:
+            offset = max(key[2] - limit, 0)
+            rows = self.ranked(False, key[2] - offset, offset=offset)[::-1]
+            start = key[2] - 1
+        else:
+            rows = self.ranked(False, limit, offset=key[2])  # the next row took the cursor's place
+            start = key[2]
+        step = -1 if backward else 1
+        keys = {pk: [score, pk, start + step * i] for i, (pk, score) in enumerate(rows)}
+        return [(keys[contact.pk], contact) for contact in load_in_order(self.user, list(keys))]
+
+    def ranked(self, backward, limit, after=None, offset=0):
+        # (id, score) of the matches in rank order (reversed when backward), past `after` if given
+        order = 'score DESC, id' if backward else 'score, id DESC'
+        where, params = '', [self.match]
+        if after is not None:
+            if backward:
+                where = 'WHERE score < %s OR (score = %s AND id > %s)'
+            else:
+                where = 'WHERE score > %s OR (score = %s AND id < %s)'
+            params += [after[0], after[0], after[1]]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id, score FROM ('
+                f'SELECT rowid AS id, {RANK} AS score FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s'
+                f') {where} ORDER BY {order} LIMIT %s OFFSET %s',
+                params + [limit, offset]
+            )
+            return cursor.fetchall()
+
+    def score_of(self, contact_id):
+        # Current score of one match (None once it no longer matches)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT {RANK} FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND rowid = %s',
+                [self.match, contact_id]
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+
+def load_in_order(user, ids):
+    # Fetch contacts by id, keeping the order of ids (re-checking user and show)
+    from contact.models import Contact
+    if not ids:
+        return []
+    order = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(ids)], output_field=IntegerField())
+    return list(
+        Contact.objects.filter(pk__in=ids, user=user, show=True)
+        .select_related('category')
+        .order_by(order)
+    )
+
+
+def search_contacts(user, text):
+    # Ranked search over the user's visible contacts
+    if is_available():
+        return ContactSearch(user, text)
+    # Fallback for other databases: substring filters, newest first
+    from contact.models import Contact, normalize_phone
+    phone_filter = Q(phone__icontains=text)
+    digits = normalize_phone(text)
+    if digits:
+        phone_filter |= Q(phone_normalized__contains=digits)  # any formatting
+    return QuerySetKeyset(Contact.objects.filter(show=True, user=user).filter(
+        Q(first_name__icontains=text) |
+        Q(last_name__icontains=text) |
+        phone_filter |
+        Q(email__icontains=text)
+    ), ['-id'])
@@ -0,0 +1,41 @@
+# Keep the contact search index, the contact counters and the cached list
+# totals in sync with the Contact table
+#
+# Note: bulk_create() and queryset.update() do not send these signals
+# (utils/create_contacts.py uses bulk_create); run
+# python manage.py rebuild_contact_search and python manage.py recount_contacts
+# afterwards. Cached totals expire on their own.
+
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from contact import counters, pagination, search
+from contact.models import Contact
+
+
+@receiver(post_init, sender=Contact)
+def remember_counted_state(sender, instance, **kwargs):
+    # What the counters hold for this contact, to compare with on save/delete
+    instance._counted_as = counters.counted_as(instance)
+
+
+@receiver(post_save, sender=Contact)
+def index_saved_contact(sender, instance, created, update_fields=None, **kwargs):
+    search.index_contact(instance)
+    pagination.bump_count_version(instance.user_id)
+
+    if update_fields is not None and not {'show', 'user', 'user_id', 'category', 'category_id'} & set(update_fields):
+        return
+    old = None if created else instance._counted_as
+    if old is counters.UNKNOWN:
+        return  # the counted fields were not loaded, so save() did not write them
+    new = counters.counted_as(instance)
+    counters.move(old, new)
+    instance._counted_as = new
+
+
+@receiver(post_delete, sender=Contact)
+def unindex_deleted_contact(sender, instance, **kwargs):
+    search.remove_contact(instance.pk)
+    pagination.bump_count_version(instance.user_id)
+    if instance._counted_as is not counters.UNKNOWN:
+        counters.move(instance._counted_as, None)
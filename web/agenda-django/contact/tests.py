@@ -1,3 +1,446 @@
+import base64
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+
+from contact.management.commands.audit_query_plans import Command as AuditQueryPlans
+from contact.counters import user_contact_count, with_contact_counts
+from contact.models import Category, Contact, UserContactCount, normalize_phone
+from contact.pagination import KeysetPaginator, encode_cursor
+from contact.search import search_contacts
+
+
+def raw_cursor(text):
+    # A hand-made cursor, as a user editing the URL would produce
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip('=')
+
+
+# Cursors that must fall back to the first page instead of raising
+GARBAGE_CURSORS = [
+    'WyJhIiwgIngiXQ',               # ["a", "x"]: id is not a number
+    '!!not-base64!!',
+    raw_cursor('not json'),
+    raw_cursor('{"a": 1}'),         # not a list
+    raw_cursor('[]'),
+    raw_cursor('["a"]'),            # too short
+    raw_cursor('["a", 1, 2]'),      # too long
+    raw_cursor('[null, 1]'),
+    raw_cursor('[["a"], 1]'),
+    raw_cursor('["a", {"id": 1}]'),
+]
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='secret')
+        other = User.objects.create_user('other', password='secret')
+        # Duplicate first names make the id tie-breaker matter
+        for i in range(25):
+            Contact.objects.create(first_name=f'Name{i % 7}', last_name=f'Last{i}', phone=f'555{i:04}', user=cls.user)
+        Contact.objects.create(first_name='Hidden', last_name='X', phone='1', user=cls.user, show=False)
+        Contact.objects.create(first_name='Other', last_name='X', phone='2', user=other)
+
+    def paginator(self):
+        contacts = Contact.objects.filter(user=self.user, show=True)
+        return KeysetPaginator(contacts, 10, ordering=('first_name', 'id'))
+
+    def expected(self):
+        return list(Contact.objects.filter(user=self.user, show=True).order_by('first_name', 'id'))
+
+    def walk_forward(self, paginator):
+        pages = [paginator.get_page({})]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page({'after': pages[-1].next_cursor}))
+        return pages
+
+    def test_forward_walk_visits_every_contact_once_in_order(self):
+        pages = self.walk_forward(self.paginator())
+
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual([c for page in pages for c in page], self.expected())
+        self.assertFalse(pages[0].has_previous())
+        self.assertTrue(pages[-1].has_previous())
+
+    def test_backward_walk_from_last_page(self):
+        paginator = self.paginator()
+        pages = [paginator.get_page({'last': '1'})]
+        while pages[-1].has_previous():
+            pages.append(paginator.get_page({'before': pages[-1].previous_cursor}))
+        pages.reverse()
+
+        self.assertEqual([c for page in pages for c in page], self.expected())
+        # Pages are cut from the end, so the short one is now at the start
+        self.assertEqual([len(page) for page in pages], [5, 10, 10])
+        self.assertFalse(pages[0].has_previous())
+        self.assertTrue(pages[0].has_next())
+        self.assertFalse(pages[-1].has_next())
+
+    def test_last_page(self):
+        page = self.paginator().get_page({'last': '1'})
+
+        self.assertEqual(list(page), self.expected()[-10:])
+        self.assertFalse(page.has_next())
+        self.assertTrue(page.has_previous())
+
+    def test_next_then_previous_returns_to_first_page(self):
+        paginator = self.paginator()
+        first = paginator.get_page({})
+        second = paginator.get_page({'after': first.next_cursor})
+        back = paginator.get_page({'before': second.previous_cursor})
+
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_cursor_past_the_end_starts_over(self):
+        page = self.paginator().get_page({'after': encode_cursor(['zzz', 10 ** 9])})
+        self.assertEqual(list(page), self.expected()[:10])
+
+    def test_garbage_cursors_give_the_first_page(self):
+        paginator = self.paginator()
+        first = list(paginator.get_page({}))
+        for cursor in GARBAGE_CURSORS:
+            for param in ('after', 'before'):
+                with self.subTest(cursor=cursor, param=param):
+                    self.assertEqual(list(paginator.get_page({param: cursor})), first)
+
+    def test_garbage_cursor_with_last_gives_the_last_page(self):
+        page = self.paginator().get_page({'before': 'WyJhIiwgIngiXQ', 'last': '1'})
+        self.assertEqual(list(page), self.expected()[-10:])
+
+    def test_contact_list_view_ignores_garbage_cursors(self):
+        self.client.force_login(self.user)
+        for cursor in GARBAGE_CURSORS:
+            for param in ('after', 'before'):
+                with self.subTest(cursor=cursor, param=param):
+                    response = self.client.get(reverse('contact:contacts'), {param: cursor})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(list(response.context['page_obj']), self.expected()[:10])
+
+    def test_search_pages_and_ignores_garbage_cursors(self):
+        results = search_contacts(self.user, 'name1')
+        paginator = KeysetPaginator(results, 2)
+        pages = self.walk_forward(paginator)
+        found = [c for page in pages for c in page]
+
+        self.assertEqual(sorted(c.pk for c in found), sorted(
+            c.pk for c in self.expected() if c.first_name == 'Name1'
+        ))
+        self.assertEqual(len(found), len(set(found)))
+
+        self.client.force_login(self.user)
+        for cursor in GARBAGE_CURSORS + [
+            raw_cursor('["a", 1, 0]'), raw_cursor('[1.5, true, 0]'), raw_cursor('[1.5, 1, -1]'),
+            raw_cursor('[1.5, 1]'),     # [score, id] cursor without a position
+        ]:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse('contact:search'), {'q': 'name1', 'after': cursor})
+                self.assertEqual(response.status_code, 200)
+
+
+class PhoneNumberTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='secret')
+        other = User.objects.create_user('other', password='secret')
+        cls.us = Contact.objects.create(first_name='A', last_name='A', phone='+1 (555) 010-0000', user=cls.user)
+        cls.local = Contact.objects.create(first_name='B', last_name='B', phone='555.010.0000', user=cls.user)
+        cls.intl = Contact.objects.create(first_name='C', last_name='C', phone='0044 20 7946 0000', user=cls.user)
+        Contact.objects.create(first_name='D', last_name='D', phone='5550100000', user=other)
+
+    def test_normalize_phone(self):
+        self.assertEqual(normalize_phone('+1 (555) 010-0000'), '15550100000')
+        self.assertEqual(normalize_phone('5550100000'), '5550100000')
+        self.assertEqual(normalize_phone('00 44 20 7946 0000'), '442079460000')
+        self.assertEqual(normalize_phone('+44 20 7946 0000'), '442079460000')
+        self.assertEqual(normalize_phone(''), '')
+        self.assertEqual(normalize_phone(None), '')
+
+    def test_save_fills_the_shadow_columns(self):
+        self.assertEqual(self.us.phone_normalized, '15550100000')
+        self.assertEqual(self.us.phone_reversed, '00000105551')
+
+        self.us.phone = '(555) 999-0000'
+        self.us.save(update_fields=['phone'])
+        self.us.refresh_from_db()
+        self.assertEqual(self.us.phone_normalized, '5559990000')
+
+    def test_phone_exact_ignores_formatting(self):
+        mine = Contact.objects.filter(user=self.user)
+        self.assertEqual(list(mine.phone_exact('(555) 010 0000')), [self.local])
+        self.assertEqual(list(mine.phone_exact('1-555-010-0000')), [self.us])
+        self.assertEqual(list(mine.phone_exact('+44 20 7946 0000')), [self.intl])
+
+    def test_phone_suffix_matches_with_or_without_country_code(self):
+        mine = Contact.objects.filter(user=self.user).order_by('pk')
+        self.assertEqual(list(mine.phone_suffix('5550100000')), [self.us, self.local])
+        self.assertEqual(list(mine.phone_suffix('(20) 7946-0000')), [self.intl])
+        self.assertEqual(list(mine.phone_suffix('0000')), [self.us, self.local, self.intl])
+        self.assertEqual(list(mine.phone_suffix('1234')), [])
+        self.assertEqual(list(mine.phone_suffix('no digits')), [])
+
+    def test_backfill_fills_rows_written_without_save(self):
+        # bulk_create() and update() bypass save(), like rows older than the columns
+        old = Contact.objects.bulk_create([
+            Contact(first_name=f'Old{i}', last_name='X', phone=f'+1 555-020-{i:04}', user=self.user)
+            for i in range(5)
+        ])
+        Contact.objects.filter(pk=self.local.pk).update(phone='+1 555 030 0000')
+        self.assertEqual(Contact.objects.filter(phone_normalized='').count(), 5)
+
+        out = StringIO()
+        call_command('backfill_phone_numbers', batch_size=2, stdout=out)
+
+        self.assertIn('Updated 6 contacts', out.getvalue())
+        self.assertFalse(Contact.objects.filter(phone_normalized='').exists())
+        self.assertEqual(Contact.objects.get(pk=old[3].pk).phone_normalized, '15550200003')
+        self.assertEqual(
+            list(Contact.objects.filter(user=self.user).phone_exact('15550300000')),
+            [Contact.objects.get(pk=self.local.pk)],
+        )
+        self.assertEqual(Contact.objects.filter(user=self.user).phone_suffix('5550200003').count(), 1)
+
+        out = StringIO()
+        call_command('backfill_phone_numbers', stdout=out)
+        self.assertIn('Updated 0 contacts', out.getvalue())
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='secret')
+        other = User.objects.create_user('other', password='secret')
+        family = Category.objects.create(category_name='Family', user=cls.user)
+        for i in range(30):
+            Contact.objects.create(
+                first_name=f'John{i}', last_name='Smith', phone=f'555-01{i:02}', user=cls.user,
+                category=family if i % 2 else None, show=i % 10 != 0,
+            )
+            Contact.objects.create(first_name=f'Jo{i}', last_name='X', phone=f'555-02{i:02}', user=other)
+
+    def plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[3] for row in cursor.fetchall()]
+
+    def assert_uses_index(self, queryset, index):
+        plan = self.plan(queryset)
+        self.assertEqual(AuditQueryPlans().flag(plan), [], plan)
+        self.assertTrue(any(index in line for line in plan), plan)
+
+    def test_hot_queries_use_the_partial_indexes(self):
+        visible = Contact.objects.filter(user=self.user, show=True)
+        self.assert_uses_index(visible.order_by('first_name', 'id')[:10], 'contact_user_name_idx')
+        self.assert_uses_index(visible.filter(first_name__gt='John1').order_by('first_name', 'id')[:10],
+                               'contact_user_name_idx')
+        self.assert_uses_index(visible.order_by('-id')[:10], 'contact_user_newest_idx')
+        self.assert_uses_index(visible.filter(category__isnull=False, category_id=1), 'contact_category_user_idx')
+        self.assert_uses_index(Contact.objects.filter(user=self.user).phone_suffix('0101'), 'contact_user_phone_rev_idx')
+
+    def test_audit_passes_for_every_view(self):
+        out, err = StringIO(), StringIO()
+        call_command('audit_query_plans', user='owner', verbose=True, stdout=out, stderr=err)
+
+        self.assertIn('All view queries use indexes', out.getvalue())
+        self.assertEqual(err.getvalue(), '')
+        # The views really ran: their contact queries were explained
+        self.assertIn('contact_user_name_idx', out.getvalue())
+        self.assertIn('contact_category_user_idx', out.getvalue())
+
+    def test_audit_flags_full_scans_and_unbounded_sorts(self):
+        flag = AuditQueryPlans().flag
+        self.assertEqual(flag(['SCAN contact_contact']), ['SCAN contact_contact'])
+        self.assertEqual(flag(['SEARCH contact_contact USING INDEX contact_user_name_idx (user_id=?)']), [])
+        self.assertEqual(flag(['SCAN contact_search VIRTUAL TABLE INDEX 0:M6']), [])
+        self.assertEqual(
+            flag(['SEARCH contact_contact USING INDEX x (user_id=?)', 'USE TEMP B-TREE FOR ORDER BY']),
+            ['USE TEMP B-TREE FOR ORDER BY'],
+        )
+
+    def test_audit_fails_when_an_index_is_missing(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX contact_user_name_idx')
+        with self.assertRaisesMessage(CommandError, 'not fully served by indexes'):
+            call_command('audit_query_plans', user='owner', stdout=StringIO(), stderr=StringIO())
+
+
+class SearchCursorTests(TestCase):
+    # bm25 scores move whenever the index changes, so cursors issued before a
+    # write must still continue from the right place
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='secret')
+        cls.other = User.objects.create_user('other', password='secret')
+        # Longer names score lower, so the ranking is spread out
+        for i in range(24):
+            Contact.objects.create(first_name='Ann', last_name=' '.join(['Lee'] * (i % 6 + 1)),
+                                   phone=f'555{i:04}', email=f'ann{i}@example.com', user=cls.user)
+
+    def ranking(self):
+        return [c.pk for c in self.walk(KeysetPaginator(search_contacts(self.user, 'ann'), 100), {})]
+
+    def walk(self, paginator, params):
+        return list(paginator.get_page(params))
+
+    def shift_scores(self):
+        # Writes by another user change the index statistics, and so every score
+        for i in range(20):
+            Contact.objects.create(first_name='Bob', last_name='Ann Ann', phone='1', user=self.other)
+
+    def test_cursor_issued_before_a_write_continues_in_place(self):
+        paginator = KeysetPaginator(search_contacts(self.user, 'ann'), 8)
+        first = paginator.get_page({})
+        score = search_contacts(self.user, 'ann').score_of(first.object_list[-1].pk)
+
+        self.shift_scores()
+        self.assertNotEqual(search_contacts(self.user, 'ann').score_of(first.object_list[-1].pk), score)
+        ranking = self.ranking()
+        self.assertEqual([c.pk for c in first], ranking[:8])
+
+        second = KeysetPaginator(search_contacts(self.user, 'ann'), 8).get_page({'after': first.next_cursor})
+        self.assertEqual([c.pk for c in second], ranking[8:16])
+        back = KeysetPaginator(search_contacts(self.user, 'ann'), 8).get_page({'before': second.previous_cursor})
+        self.assertEqual([c.pk for c in back], ranking[:8])
+        self.assertFalse(back.has_previous())
+
+    def test_walks_agree_with_and_without_writes(self):
+        paginator = KeysetPaginator(search_contacts(self.user, 'ann'), 5)
+        pages = [paginator.get_page({})]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page({'after': pages[-1].next_cursor}))
+        self.assertEqual([c.pk for page in pages for c in page], self.ranking())
+
+        last = paginator.get_page({'last': '1'})
+        self.shift_scores()
+        before = KeysetPaginator(search_contacts(self.user, 'ann'), 5).get_page({'before': last.previous_cursor})
+        ranking = self.ranking()
+        self.assertEqual([c.pk for c in last], ranking[-5:])
+        self.assertEqual([c.pk for c in before], ranking[-10:-5])
+
+    def test_cursor_row_deleted(self):
+        paginator = KeysetPaginator(search_contacts(self.user, 'ann'), 8)
+        first = paginator.get_page({})
+        first.object_list[-1].delete()
+
+        second = KeysetPaginator(search_contacts(self.user, 'ann'), 8).get_page({'after': first.next_cursor})
+        self.assertEqual([c.pk for c in second], self.ranking()[7:15])
+        back = KeysetPaginator(search_contacts(self.user, 'ann'), 8).get_page({'before': second.previous_cursor})
+        self.assertEqual([c.pk for c in back], self.ranking()[:7])
+
+
+class ContactCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='secret')
+        cls.other = User.objects.create_user('other', password='secret')
+        cls.family = Category.objects.create(category_name='Family', user=cls.user)
+        cls.work = Category.objects.create(category_name='Work', user=cls.user)
+        for i in range(6):
+            Contact.objects.create(first_name=f'F{i}', last_name='X', phone='1', user=cls.user, category=cls.family)
+        for i in range(3):
+            Contact.objects.create(first_name=f'W{i}', last_name='X', phone='2', user=cls.user, category=cls.work)
+        Contact.objects.create(first_name='Hidden', last_name='X', phone='3', user=cls.user, show=False)
+        Contact.objects.create(first_name='O', last_name='X', phone='4', user=cls.other, category=cls.work)
+
+    def assert_counters_match(self):
+        # Every counter must equal a fresh COUNT(*) of the visible contacts
+        for user in User.objects.all():
+            self.assertEqual(user_contact_count(user), Contact.objects.filter(user=user, show=True).count(), user)
+        for category in with_contact_counts(Category.objects.all()):
+            self.assertEqual(
+                category.contact_count, Contact.objects.filter(category=category, show=True).count(), category
+            )
+
+    def test_initial_counts(self):
+        self.assertEqual(user_contact_count(self.user), 9)
+        self.assertEqual(user_contact_count(self.other), 1)
+        self.assert_counters_match()
+
+    def test_hiding_and_showing(self):
+        contact = Contact.objects.filter(category=self.family).first()
+        contact.show = False
+        contact.save()
+        self.assertEqual(user_contact_count(self.user), 8)
+        self.assert_counters_match()
+
+        contact = Contact.objects.get(pk=contact.pk)
+        contact.show = True
+        contact.save(update_fields=['show'])
+        self.assertEqual(user_contact_count(self.user), 9)
+        self.assert_counters_match()
+
+    def test_hidden_contact_changes_count_nothing(self):
+        hidden = Contact.objects.get(first_name='Hidden')
+        hidden.category = self.family
+        hidden.save()
+        hidden.delete()
+        self.assertEqual(user_contact_count(self.user), 9)
+        self.assert_counters_match()
+
+    def test_category_move(self):
+        contact = Contact.objects.filter(category=self.family).first()
+        contact.category = self.work
+        contact.save()
+        self.assert_counters_match()
+
+        contact.category = None
+        contact.save(update_fields=['category'])
+        self.assert_counters_match()
+
+    def test_partial_load_does_not_break_counters(self):
+        # .only() skips the counted fields: saving other fields must not move counters
+        contact = Contact.objects.only('first_name').filter(category=self.family).first()
+        contact.first_name = 'Renamed'
+        contact.save(update_fields=['first_name'])
+        self.assert_counters_match()
+
+    def test_delete(self):
+        Contact.objects.filter(category=self.work, user=self.user).first().delete()
+        self.assertEqual(user_contact_count(self.user), 8)
+        self.assert_counters_match()
+
+        Contact.objects.filter(user=self.other).delete()  # queryset delete still sends post_delete
+        self.assertEqual(user_contact_count(self.other), 0)
+        self.assert_counters_match()
+
+    def test_deleting_a_category_that_still_has_contacts(self):
+        self.family.delete()  # contacts are kept, with category=NULL
+        self.assertEqual(Contact.objects.filter(user=self.user, category__isnull=True, show=True).count(), 6)
+        self.assertEqual(user_contact_count(self.user), 9)
+        self.assert_counters_match()
+
+    def test_deleting_a_user(self):
+        self.other.delete()
+        self.assertFalse(UserContactCount.objects.filter(user_id=self.other.pk).exists())
+        self.assert_counters_match()
+
+    def test_recount_repairs_drifted_counters(self):
+        user_contact_count(self.user)
+        with_contact_counts(Category.objects.all())
+        # Writes that bypass the signals leave the counters behind
+        Contact.objects.filter(category=self.family).update(show=False)
+        Category.objects.filter(pk=self.work.pk).update(contact_count=42)
+        UserContactCount.objects.filter(user=self.other).update(count=7)
+        self.assertEqual(user_contact_count(self.user), 9)
+
+        out = StringIO()
+        call_command('recount_contacts', stdout=out)
+
+        self.assertIn('Recounted 2 categories and 2 users', out.getvalue())
+        self.assertEqual(user_contact_count(self.user), 3)
+        self.assertEqual(Category.objects.get(pk=self.family.pk).contact_count, 0)
+        self.assertEqual(Category.objects.get(pk=self.work.pk).contact_count, 4)
+        self.assert_counters_match()
+
+    def test_recount_drops_counters_of_users_without_visible_contacts(self):
+        user_contact_count(self.other)
+        Contact.objects.filter(user=self.other).update(show=False)
 
-# Create your tests here.
+        call_command('recount_contacts', stdout=StringIO())
+        self.assertFalse(UserContactCount.objects.filter(user=self.other).exists())
+        self.assertEqual(user_contact_count(self.other), 0)
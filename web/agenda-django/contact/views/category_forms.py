@@ -2,14 +2,15 @@
 
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.decorators import login_required
+from contact.counters import with_contact_counts
 from contact.forms import CategoryForm
 from contact.models import Contact, Category
 
 
 @login_required
 def category_list(request):
-    # List all categories for the user
-    categories = Category.objects.filter(user=request.user)
+    # List all categories for the user, with their (denormalized) contact counts
+    categories = with_contact_counts(Category.objects.filter(user=request.user))
     return render(request, 'category/categories.html', {
         'categories': categories
     })
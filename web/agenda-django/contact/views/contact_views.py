@@ -2,10 +2,11 @@
 
 from django.contrib import messages
 from django.contrib.auth.views import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, render, redirect
-from django.db.models import Q
+from contact.counters import user_contact_count
 from contact.models import Contact
+from contact.pagination import KeysetPaginator, cached_count
+from contact.search import search_contacts
 
 
 @login_required
@@ -13,11 +14,14 @@ def contacts(request):
     # List all contacts for the logged-in user
     contacts = Contact.objects.filter(
         user=request.user, show=True
-    ).order_by("first_name")
+    )
 
-    paginator = Paginator(contacts, 10)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    # Keyset pages by (first_name, id); the total comes from the user's contact counter
+    paginator = KeysetPaginator(
+        contacts, 10, ordering=('first_name', 'id'),
+        count=lambda: user_contact_count(request.user),
+    )
+    page_obj = paginator.get_page(request.GET)
 
     return render(request, 'contact/contacts.html', {
         'page_obj': page_obj,
@@ -44,18 +48,14 @@ def search(request):
     if search_value == '':
         return redirect('contact:contacts')
 
-    contacts = Contact.objects.filter(
-        show=True, user=request.user
-    ).filter(
-        Q(first_name__icontains=search_value) |
-        Q(last_name__icontains=search_value) |
-        Q(phone__icontains=search_value) |
-        Q(email__icontains=search_value)
-    ).order_by('-id')
-
-    paginator = Paginator(contacts, 8)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    # Ranked full-text search (see contact/search.py)
+    contacts = search_contacts(request.user, search_value)
+
+    paginator = KeysetPaginator(
+        contacts, 8,
+        count=lambda: cached_count(request.user.pk, f'search:{search_value}', contacts.count),
+    )
+    page_obj = paginator.get_page(request.GET)
 
     return render(request, 'contact/contacts.html', {
         'page_obj': page_obj,
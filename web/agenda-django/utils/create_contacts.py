@@ -18,6 +18,7 @@ django.setup()
 
 if __name__ == '__main__':
     import faker
+    from contact import counters, search
     from contact.models import Category, Contact
 
     #Contact.objects.all().delete() #CAUTION
@@ -42,17 +43,20 @@ if __name__ == '__main__':
         description = fake.text(max_nb_chars=100)
         category = choice(django_categories)
 
-        django_contacts.append(
-            Contact(
-                first_name=first_name,
-                last_name=last_name,
-                phone=phone,
-                email=email,
-                created_date=created_date,
-                description=description,
-                category=category,
-            )
+        contact = Contact(
+            first_name=first_name,
+            last_name=last_name,
+            phone=phone,
+            email=email,
+            created_date=created_date,
+            description=description,
+            category=category,
         )
+        contact.normalize_phone()  # bulk_create skips save(), which normally does this
+        django_contacts.append(contact)
 
     if len(django_contacts) > 0:
         Contact.objects.bulk_create(django_contacts)
+        # bulk_create skips the model signals, so refresh the search index and counters by hand
+        search.rebuild_index()
+        counters.recount_all()
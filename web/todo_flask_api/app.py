@@ -1,7 +1,16 @@
 # app.py
 
-from flask import Flask, render_template
+from flask import Flask
+from assets import init_assets, render_cached
 from database import db
+from events import init_events
+from idempotency import init_idempotency
+from instrumentation import init_instrumentation
+from json_provider import FastJSONProvider
+from sqlite_profile import apply_sqlite_pragmas, sqlite_engine_options
+from write_behind import init_write_behind
+from models import init_collection_version
+from response_compression import init_compression
 from routes import bp as tasks_bp
 import os
 
@@ -9,25 +18,67 @@ import os
 # Explicitly specify template folder path (optional, default is 'templates')
 app = Flask(__name__, template_folder=os.path.join(os.path.dirname(__file__), 'templates'))
 
+# Use the orjson-backed JSON provider for jsonify() (falls back to stdlib json)
+app.json = FastJSONProvider(app)
+
 # Configure SQLAlchemy database URI (SQLite local file)
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///tasks.db'
 
 # Disable track modifications to avoid overhead warnings
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Connection pool tuned for multi-threaded servers (see sqlite_profile.py)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+
+# Overrides for sqlite_profile.DEFAULT_PRAGMAS (WAL, synchronous=NORMAL, busy_timeout...)
+app.config['SQLITE_PRAGMAS'] = {}
+
 # Initialize SQLAlchemy with this Flask app context
 db.init_app(app)
 
+# Run the SQLite PRAGMAs on every new database connection
+apply_sqlite_pragmas(app, db)
+
+# Opt-in profiling: Server-Timing headers, /metrics and slow-request stack dumps
+app.config['INSTRUMENTATION'] = False
+app.config['INSTRUMENTATION_SLOW_MS'] = 0   # 0 disables the sampling profiler
+init_instrumentation(app, db)
+
+# Negotiated gzip/brotli/zstd compression for JSON responses over 1 KiB
+# (text/event-stream is not in COMPRESSION_MIMETYPES, so SSE stays uncompressed)
+app.config['COMPRESSION'] = True
+app.config['COMPRESSION_LEVELS'] = {}   # e.g. {'gzip': 9}
+init_compression(app)
+
+# In-process broadcaster behind GET /tasks/events (bounded queue per client)
+app.config['TASK_EVENTS_QUEUE_SIZE'] = 100
+init_events(app)
+
+# Optional write-behind creates: POST /tasks/ answers 202 once the task is in an
+# fsync'd log and a background thread inserts queued tasks in batches.
+# Read from the environment so serve.py can decide without importing the app
+# (python serve.py --write-behind sets it)
+app.config['WRITE_BEHIND'] = os.environ.get('TASKS_WRITE_BEHIND') == '1'
+init_write_behind(app)
+
+# Idempotency-Key handling for POST /tasks/: stored responses are replayed for 24 hours
+app.config['IDEMPOTENCY_TTL'] = 24 * 3600
+init_idempotency(app)
+
 # Register the tasks blueprint for routes under '/tasks'
 app.register_blueprint(tasks_bp)
 
+# Fingerprinted, precompressed static files under /assets/ (build with: python assets.py)
+init_assets(app)
+
 # Route to serve the frontend HTML page (index.html)
 @app.route("/")
 def serve_frontend():
-    return render_template("index.html")  # Render from 'templates/index.html'
+    return render_cached("index.html")  # Rendered once from 'templates/index.html', then served from memory
 
 # Run app with debug mode on if script is run directly
 if __name__ == "__main__":
     with app.app_context():
         db.create_all()   # Create tables if they do not exist yet
-    app.run(debug=True)
+        init_collection_version()  # Seed the collection counter and its triggers
+    app.run(debug=True, threaded=True)   # Each open event stream holds a thread
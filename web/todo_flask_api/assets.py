@@ -0,0 +1,164 @@
+# assets.py
+#
+# Static asset pipeline for the frontend.
+#
+# Build step (run after changing anything in static/):
+#     python assets.py
+# copies every file in static/ to static/dist/ under a content-hashed name
+# (style.css -> style.3f2a9c1b7d4e.css), writes .gz (and .br, if the brotli
+# package is installed) next to it and records the mapping in manifest.json.
+#
+# At runtime asset_url('style.css') resolves through the manifest, /assets/
+# serves the hashed files precompressed with immutable cache headers, and the
+# rendered index page is kept in memory.
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import sys
+from flask import Response, current_app, render_template, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST = 'manifest.json'
+
+# Hashed files never change, so browsers may keep them for a year without revalidating
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# File types worth precompressing (images and fonts are already compressed)
+COMPRESSIBLE = ('.css', '.js', '.html', '.svg', '.json', '.txt', '.map')
+
+# Precompressed variants in order of preference: (Content-Encoding, file suffix)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+# Write data compressed next to path (path.gz and, when available, path.br)
+def precompress(path, data):
+    with open(path + '.gz', 'wb') as fh:
+        fh.write(gzip.compress(data, compresslevel=9, mtime=0))   # mtime=0: identical input, identical output
+    if brotli is not None:
+        with open(path + '.br', 'wb') as fh:
+            fh.write(brotli.compress(data, quality=11))
+
+
+# Fingerprint and precompress everything in static/; returns the manifest
+def build_assets(static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    os.makedirs(dist_dir)
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != dist_dir]   # Skip previous build output
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_dir).replace(os.sep, '/')
+            with open(source, 'rb') as fh:
+                data = fh.read()
+
+            stem, ext = os.path.splitext(logical)
+            hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+            target = os.path.join(dist_dir, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as fh:
+                fh.write(data)
+            if ext in COMPRESSIBLE:
+                precompress(target, data)
+            manifest[logical] = hashed
+
+    with open(os.path.join(dist_dir, MANIFEST), 'w') as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    return manifest
+
+
+# Best precompressed variant of dist_dir/filename the client accepts: (encoding, filename)
+def negotiate(dist_dir, filename):
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.exists(os.path.join(dist_dir, filename + suffix)):
+            return encoding, filename + suffix
+    return None, filename
+
+
+# Serve a fingerprinted file from static/dist
+def serve_asset(filename):
+    dist_dir = current_app.config['ASSETS_DIST_DIR']
+    encoding, stored = negotiate(dist_dir, filename)
+    # The mimetype comes from the original name, not from the .gz/.br one
+    response = send_from_directory(dist_dir, stored, mimetype=mimetype_for(filename), conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = IMMUTABLE
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def mimetype_for(filename):
+    return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+
+# URL of a static file: the fingerprinted copy when it has been built, the plain one otherwise
+def asset_url(filename):
+    hashed = current_app.extensions['assets'].get(filename)
+    if hashed is None:
+        return url_for('static', filename=filename)
+    return url_for('assets', filename=hashed)
+
+
+# Rendered page plus its precompressed bodies and ETag, built once per template
+class CachedPage:
+    def __init__(self, html):
+        self.bodies = {None: html.encode()}
+        self.bodies['gzip'] = gzip.compress(self.bodies[None], compresslevel=9, mtime=0)
+        if brotli is not None:
+            self.bodies['br'] = brotli.compress(self.bodies[None], quality=11)
+        self.etag = hashlib.sha256(self.bodies[None]).hexdigest()[:16]
+
+    def response(self):
+        headers = {'ETag': f'"{self.etag}"', 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+        # Weak match: response compression turns the ETag into W/"..." on the way out
+        if request.if_none_match.contains_weak(self.etag):
+            return Response(status=304, headers=headers)   # Repeat visit: no body at all
+
+        encoding = next((e for e, _ in ENCODINGS if e in self.bodies and request.accept_encodings[e]), None)
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return Response(self.bodies[encoding], mimetype='text/html', headers=headers)
+
+
+# Render a template once and serve it from memory afterwards
+# (re-rendered on every request while templates auto-reload, e.g. in debug mode)
+def render_cached(template):
+    pages = current_app.extensions['rendered_pages']
+    page = pages.get(template)
+    if page is None or current_app.jinja_env.auto_reload:
+        page = pages[template] = CachedPage(render_template(template))
+    return page.response()
+
+
+# Load the manifest and register the /assets/ route and the asset_url() template helper
+def init_assets(app):
+    app.config.setdefault('ASSETS_DIST_DIR', DIST_DIR)
+    manifest_path = os.path.join(app.config['ASSETS_DIST_DIR'], MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as fh:
+            manifest = json.load(fh)
+    app.extensions['assets'] = manifest
+    app.extensions['rendered_pages'] = {}
+    app.add_url_rule('/assets/<path:filename>', 'assets', serve_asset)
+    app.add_template_global(asset_url)
+
+
+if __name__ == '__main__':
+    built = build_assets()
+    for logical, hashed in built.items():
+        print(f"{logical} -> dist/{hashed}")
+    if brotli is None:
+        print("brotli is not installed: only .gz files were written", file=sys.stderr)
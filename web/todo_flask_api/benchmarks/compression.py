@@ -0,0 +1,70 @@
+# benchmarks/compression.py
+#
+# Bytes saved and CPU cost of response compression on GET /tasks/ payloads.
+#
+# Usage: python benchmarks/compression.py [rows] [repeat]
+
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Make the app modules (json_provider, response_compression) importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask import Flask
+
+from json_provider import FastJSONProvider
+from response_compression import available_encodings, compress
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+REPEAT = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+# Levels tried per encoding: fastest, default, strongest
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 11), 'zstd': (1, 3, 19)}
+
+
+# Encoded body of a GET /tasks/ response with ROWS tasks
+def payload(app):
+    start = datetime(2025, 1, 1)
+    tasks = [
+        {
+            'id': i,
+            'title': f"Task {i}",
+            'description': f"Follow up on item {i} with the team before the release.",
+            'created_at': start + timedelta(minutes=i)
+        }
+        for i in range(ROWS)
+    ]
+    body = {'success': True, 'message': "All tasks retrieved.", 'data': tasks}
+    with app.app_context():
+        return app.json.response(body).get_data()
+
+
+# Fastest of REPEAT runs, plus the last result
+def best_of(fn):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    data = payload(app)
+    print(f"rows={ROWS} body={len(data) / 1024:.0f} KiB")
+    print(f"{'encoding':10} {'level':>5} {'size KiB':>9} {'saved':>7} {'ms':>8} {'MB/s':>8}")
+    for encoding in available_encodings():
+        for level in LEVELS[encoding]:
+            seconds, out = best_of(lambda: compress(encoding, level, data))
+            print(
+                f"{encoding:10} {level:>5} {len(out) / 1024:>9.1f} "
+                f"{1 - len(out) / len(data):>7.1%} {seconds * 1000:>8.2f} {len(data) / seconds / 1e6:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/serialization.py
+#
+# Micro-benchmark: ORM + serialize_obj_list + stdlib jsonify vs the fast path
+# (column select + serialize_rows + FastJSONProvider).
+#
+# Usage: python benchmarks/serialization.py [rows] [repeat]
+
+import sys
+import time
+from pathlib import Path
+
+# Make the app modules (database, helpers, models...) importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import insert, select
+
+from database import db
+from helpers import serialize_obj_list, serialize_rows
+from json_provider import FastJSONProvider, orjson
+from models import Task
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+REPEAT = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+
+# What GET /tasks/ did before: build Task objects, then dicts, then stdlib JSON
+def current_path(app):
+    tasks = Task.query.order_by(Task.created_at.desc()).all()
+    return app.json.response(serialize_obj_list(tasks))
+
+
+# Fast path: plain column tuples straight into the orjson provider
+def fast_path(app):
+    stmt = select(Task.id, Task.title, Task.description, Task.created_at).order_by(Task.created_at.desc())
+    return app.json.response(serialize_rows(db.session.execute(stmt).all()))
+
+
+# Run fn REPEAT times and keep the best wall time plus the body size
+def best_of(fn, app):
+    timings = []
+    for _ in range(REPEAT):
+        db.session.expunge_all()   # Drop cached ORM instances between runs
+        start = time.perf_counter()
+        body = fn(app).get_data()
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(body)
+
+
+def main():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'   # In-memory database
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Task), [
+            {'title': f'Task {i}', 'description': 'lorem ipsum dolor sit amet ' * 4}
+            for i in range(ROWS)
+        ])
+        db.session.commit()
+
+        app.json = DefaultJSONProvider(app)
+        baseline, size = best_of(current_path, app)
+        app.json = FastJSONProvider(app)
+        fast, fast_size = best_of(fast_path, app)
+
+    print(f"rows={ROWS} repeat={REPEAT} orjson={'yes' if orjson else 'no'}")
+    print(f"current  {baseline * 1000:8.1f} ms  {size} bytes")
+    print(f"fast     {fast * 1000:8.1f} ms  {fast_size} bytes")
+    print(f"speedup  {baseline / fast:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
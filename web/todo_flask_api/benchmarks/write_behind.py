@@ -0,0 +1,101 @@
+# benchmarks/write_behind.py
+#
+# Sustained POST /tasks/ throughput: one commit per request vs write-behind batching.
+#
+# Usage: python benchmarks/write_behind.py [seconds] [clients]
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Make the app modules (database, models, routes...) importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask import Flask
+
+from database import db
+from models import Task, init_collection_version
+from routes import bp as tasks_bp
+from sqlite_profile import apply_sqlite_pragmas, sqlite_engine_options
+from write_behind import init_write_behind
+
+SECONDS = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+CLIENTS = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+
+# App configured like app.py, on a fresh database file
+def make_app(write_behind):
+    directory = tempfile.mkdtemp()
+    uri = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_engine_options(uri)
+    app.config['WRITE_BEHIND'] = write_behind
+    app.config['WRITE_BEHIND_LOG'] = os.path.join(directory, 'write-behind.log')
+    db.init_app(app)
+    apply_sqlite_pragmas(app, db)
+    app.register_blueprint(tasks_bp)
+    with app.app_context():
+        db.create_all()
+        init_collection_version()
+    init_write_behind(app)
+    return app
+
+
+# Value at the given percentile of an already sorted list
+def percentile(values, pct):
+    return values[min(int(len(values) * pct / 100), len(values) - 1)] if values else 0.0
+
+
+# CLIENTS threads creating tasks as fast as they are acknowledged
+def run(write_behind):
+    app = make_app(write_behind)
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + SECONDS
+
+    def client():
+        http = app.test_client()
+        mine = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            http.post('/tasks/', json={'title': 'bench', 'description': 'y' * 200})
+            mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client) for _ in range(CLIENTS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Time until every acknowledged task is actually in the database
+    start = time.perf_counter()
+    queue = app.extensions.get('write_behind')
+    if queue is not None:
+        queue.close()
+    drain = time.perf_counter() - start
+
+    with app.app_context():
+        rows = db.session.query(Task).count()
+    latencies.sort()
+    return len(latencies), rows, drain, latencies
+
+
+def main():
+    print(f"seconds={SECONDS} clients={CLIENTS}")
+    for label, write_behind in (("commit", False), ("write-behind", True)):
+        acked, rows, drain, lat = run(write_behind)
+        print(
+            f"{label:12} creates/s {acked / SECONDS:8.1f}  "
+            f"p50 {percentile(lat, 50) * 1000:6.2f} ms  p99 {percentile(lat, 99) * 1000:6.2f} ms  "
+            f"rows {rows} (drained in {drain * 1000:.0f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
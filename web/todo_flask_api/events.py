@@ -0,0 +1,107 @@
+# events.py
+
+import queue
+import threading
+from itertools import count
+from flask import current_app
+
+
+# One connected GET /tasks/events client
+class Subscriber:
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)   # Bounded: a stalled client cannot grow memory
+        self.dropped = False                        # Set when the queue overflowed
+        self.closed = False                         # Set when the server shuts down
+
+
+# In-process pub/sub fan-out for task change events
+# Each event is encoded once and the same bytes are queued for every subscriber.
+# A subscriber whose queue is full is dropped instead of blocking the writer;
+# its stream ends and the client reconnects and resyncs through GET /tasks/changes.
+# close() ends every stream so a stopping server is not held up by idle clients.
+class EventBroker:
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = count(1)
+        self._closed = False
+
+    def subscribe(self):
+        subscriber = Subscriber(self.queue_size)
+        with self._lock:
+            if self._closed:
+                subscriber.closed = True
+            else:
+                self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    # Queue one event for every subscriber (never blocks)
+    def publish(self, event, payload):
+        with self._lock:
+            message = f"id: {next(self._ids)}\nevent: {event}\ndata: {payload}\n\n".encode()
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(message)
+            except queue.Full:
+                # Slow consumer: cut it loose rather than hold up everyone else
+                subscriber.dropped = True
+                self.unsubscribe(subscriber)
+
+    # End every stream, now and for later subscribers; clients reconnect after the retry delay
+    def close(self):
+        with self._lock:
+            self._closed = True
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+        for subscriber in subscribers:
+            subscriber.closed = True
+            try:
+                subscriber.queue.put_nowait(b"")   # Wake a stream waiting for its next event
+            except queue.Full:
+                pass   # Not waiting: it sees the flag on its next loop
+
+    # Generator of SSE frames for one subscriber; sends a comment line as keep-alive
+    def stream(self, subscriber, keepalive):
+        try:
+            yield b"retry: 1000\n\n"   # Reconnect delay hint for EventSource
+            while not (subscriber.dropped or subscriber.closed):
+                try:
+                    message = subscriber.queue.get(timeout=keepalive)
+                except queue.Empty:
+                    message = b": keep-alive\n\n"
+                if message:
+                    yield message
+            if subscriber.dropped:
+                yield b"event: dropped\ndata: {}\n\n"
+        finally:
+            # Runs when the client disconnects too (the server closes the generator)
+            self.unsubscribe(subscriber)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+
+# Attach an EventBroker to the app (config: TASK_EVENTS_QUEUE_SIZE, TASK_EVENTS_KEEPALIVE)
+def init_events(app):
+    app.config.setdefault('TASK_EVENTS_QUEUE_SIZE', 100)
+    app.config.setdefault('TASK_EVENTS_KEEPALIVE', 15)
+    app.extensions['task_events'] = EventBroker(app.config['TASK_EVENTS_QUEUE_SIZE'])
+
+
+# Broker of the current app, or None when events are not enabled
+def get_broker():
+    return current_app.extensions.get('task_events')
+
+
+# Broadcast a task change; call only after the change is committed
+def publish_task_event(event, data):
+    broker = get_broker()
+    if broker is None or not len(broker):
+        return   # Nobody listening: skip the JSON encoding as well
+    broker.publish(event, current_app.json.dumps(data))
@@ -1,14 +1,30 @@
 # helpers.py
 
-from flask import jsonify
+import base64
+import hashlib
+from datetime import datetime
+from flask import Response, jsonify, request
+
+# Page size limits for keyset pagination on GET /tasks/
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Maximum number of operations accepted by POST /tasks/batch
+MAX_BATCH_OPERATIONS = 5000
 
 # Standard JSON response helper function with success flag, message, data, and status code
-def send_response(data=None, msg="", status=200, success=True):
-    return jsonify({
+def send_response(data=None, msg="", status=200, success=True, headers=None, meta=None):
+    payload = {
         'success': success,     # Boolean indicating if operation succeeded
         'message': msg,         # Message to send to client
         'data': data            # Payload (usually serialized object or list)
-        }), status              # HTTP status code returned alongside JSON
+        }
+    if meta is not None:
+        payload['meta'] = meta  # Extra info such as pagination cursors
+    body = jsonify(payload)
+    if headers:
+        return body, status, headers    # Extra response headers (e.g. ETag)
+    return body, status                 # HTTP status code returned alongside JSON
 
 
 # Check if any required fields are missing from the request data dictionary
@@ -17,6 +33,16 @@ def missing_fields(req_fields, data):
     return missing if missing else None                  # Return list or None if all present
 
 
+# Check the types of task fields present in data; returns an error message or None
+# (title must be a string, description a string or null)
+def invalid_task_fields(data):
+    if 'title' in data and not isinstance(data['title'], str):
+        return "'title' must be a string."
+    if data.get('description') is not None and not isinstance(data['description'], str):
+        return "'description' must be a string or null."
+    return None
+
+
 # Retrieve a database object by ID and model class (returns None if not found)
 def find_by_id(obj_id, model):
     return model.query.get(obj_id)
@@ -32,8 +58,110 @@ def serialize_obj(obj):
             }
 
 
+# Fast path: turn rows from a column-only select into dictionaries
+# (no ORM instances are built; datetimes are left for the JSON encoder)
+def serialize_rows(rows):
+    return [row._asdict() for row in rows]
+
+
 # Serialize a list of database objects into list of dictionaries
 def serialize_obj_list(obj_list):
     serialized_list = [serialize_obj(o) for o in obj_list if o]  # Filter out any None objects
     return serialized_list
 
+
+
+# Build a strong ETag for a single task from its id, creation time and row version
+def task_etag(task_id, created_at, version):
+    return f"task-{task_id}-{created_at.timestamp():.6f}-{version}"
+
+
+# Build a strong ETag for a collection from its change counter and the query string
+def collection_etag(name, version):
+    args = hashlib.sha1(request.query_string).hexdigest()[:12]
+    return f"{name}-{version}-{args}"
+
+
+# Headers sent with every cacheable response (clients must revalidate before reuse)
+def etag_headers(etag):
+    return {'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+
+
+# Return a bodyless 304 response if the client's If-None-Match matches, else None
+def not_modified(etag):
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    response.headers.update(etag_headers(etag))
+    return response
+
+
+# Encode the (created_at, id) position of a row into an opaque URL-safe cursor
+def encode_cursor(row):
+    raw = f"{row.created_at.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+# Decode a cursor back into (created_at, id); returns None if it is malformed
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, obj_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(created_at), int(obj_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+# Parse the ?limit= value (clamped to MAX_PAGE_SIZE); returns None if invalid
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        return None
+    return min(limit, maximum) if limit >= 1 else None
+
+
+# Parse an ISO 8601 date/datetime query parameter; returns None if invalid
+def parse_datetime(value):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+# Smallest string greater than every string starting with prefix
+# (lets "title starts with" run as an index range scan instead of LIKE).
+# Surrogates (U+D800..U+DFFF) cannot be stored, so U+D7FF steps to U+E000;
+# a trailing U+10FFFF has no successor and is dropped, carrying into the
+# previous character. Returns None when there is no upper bound at all.
+def prefix_upper_bound(prefix):
+    while prefix:
+        code = ord(prefix[-1]) + 1
+        if 0xD800 <= code <= 0xDFFF:
+            code = 0xE000
+        if code <= 0x10FFFF:
+            return prefix[:-1] + chr(code)
+        prefix = prefix[:-1]
+    return None
+
+
+# True for a usable task id from JSON: an int, but not a bool
+# (True == 1, so JSON true would otherwise address task 1)
+def is_task_id(value):
+    return type(value) is int
+
+
+# Per-operation result entry returned by POST /tasks/batch
+def batch_result(index, op, status, obj_id=None, msg=""):
+    return {'index': index, 'op': op, 'status': status, 'id': obj_id, 'message': msg}
+
+
+# Parse a delta sync token (non-negative integer); returns None if invalid
+def parse_sync_token(value):
+    try:
+        token = int(value)
+    except ValueError:
+        return None
+    return token if token >= 0 else None
@@ -0,0 +1,162 @@
+# idempotency.py
+
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import Response, current_app, request
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.sqlite import insert
+from database import db
+from helpers import send_response
+from models import IdempotencyKey
+
+# Request header carrying the client-chosen key, and its maximum length (the column size)
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+# Wakes requests waiting on a duplicate handled by this process; other processes poll
+_finished = threading.Condition()
+_last_purge = [0.0]
+
+
+# Config defaults (IDEMPOTENCY_TTL, IDEMPOTENCY_WAIT, IDEMPOTENCY_LOCK_TIMEOUT, IDEMPOTENCY_PURGE_INTERVAL)
+def init_idempotency(app):
+    app.config.setdefault("IDEMPOTENCY_TTL", 24 * 3600)  # seconds a stored response is replayed
+    app.config.setdefault("IDEMPOTENCY_WAIT", 10)  # seconds a duplicate waits for the first request
+    app.config.setdefault("IDEMPOTENCY_LOCK_TIMEOUT", 60)  # an unfinished claim older than this is abandoned
+    app.config.setdefault("IDEMPOTENCY_PURGE_INTERVAL", 60)
+
+
+# Hash of method, path and body: a key may only be reused for the identical request
+def request_fingerprint():
+    digest = hashlib.sha256(f"{request.method} {request.path}\n".encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+# View decorator: requests carrying an Idempotency-Key run once; repeats get the
+# stored response back without the view (or the task table) being touched
+def idempotent(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return send_response(msg=f"{HEADER} must be 1-{MAX_KEY_LENGTH} characters.", status=400, success=False)
+
+        fingerprint = request_fingerprint()
+        state, record = claim(key, fingerprint)
+        if state == "busy":
+            return send_response(msg=f"A request with this {HEADER} is still in progress.", status=409, success=False)
+        if state == "mismatch":
+            return send_response(msg=f"{HEADER} was already used for a different request.", status=422, success=False)
+        if state == "replay":
+            # Stored response, byte for byte
+            return Response(record.body, status=record.status, mimetype=record.mimetype,
+                    headers={"Idempotent-Replayed": "true"})
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except BaseException:
+            release(key)
+            raise
+        if response.status_code >= 500:
+            release(key)  # Server errors are not stored: let the client retry
+        else:
+            complete(key, response)
+        return response
+    return wrapper
+
+
+# Try to become the owner of a key. Returns (state, record) where state is
+# "owner" (run the view), "replay", "mismatch" or "busy" (waited too long)
+def claim(key, fingerprint):
+    config = current_app.config
+    deadline = time.monotonic() + config["IDEMPOTENCY_WAIT"]
+    purge_expired()
+
+    while True:
+        now = datetime.utcnow()
+        inserted = db.session.execute(
+                insert(IdempotencyKey.__table__)
+                .values(key=key, fingerprint=fingerprint, created_at=now,
+                    expires_at=now + timedelta(seconds=config["IDEMPOTENCY_TTL"]))
+                .on_conflict_do_nothing(index_elements=["key"])
+                )
+        db.session.commit()
+        if inserted.rowcount == 1:
+            return "owner", None
+
+        record = db.session.execute(
+                select(IdempotencyKey.__table__).where(IdempotencyKey.key == key)
+                ).first()
+        if record is None:
+            continue  # Released in the meantime
+        if record.expires_at <= now:
+            remove(key, IdempotencyKey.expires_at == record.expires_at)
+            continue
+        if record.fingerprint != fingerprint:
+            return "mismatch", record
+        if record.status is not None:
+            return "replay", record
+
+        if record.created_at <= now - timedelta(seconds=config["IDEMPOTENCY_LOCK_TIMEOUT"]):
+            # The first request died without finishing: take its claim over
+            taken = db.session.execute(
+                    update(IdempotencyKey)
+                    .where(IdempotencyKey.key == key, IdempotencyKey.status.is_(None),
+                        IdempotencyKey.created_at == record.created_at)
+                    .values(created_at=now)
+                    )
+            db.session.commit()
+            if taken.rowcount == 1:
+                return "owner", None
+            continue
+
+        # Still in flight: wait for it (woken immediately when it finishes in this process)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return "busy", record
+        with _finished:
+            _finished.wait(min(remaining, 0.05))
+
+
+# Store the response of the owning request
+def complete(key, response):
+    db.session.rollback()  # Never commit leftovers of the view together with the record
+    db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(status=response.status_code, mimetype=response.mimetype, body=response.get_data())
+            )
+    db.session.commit()
+    with _finished:
+        _finished.notify_all()
+
+
+# Give the key up after a failure so a retry can run the view again
+def release(key):
+    db.session.rollback()
+    remove(key, IdempotencyKey.status.is_(None))
+    with _finished:
+        _finished.notify_all()
+
+
+# Delete the record of a key if condition still holds
+def remove(key, condition):
+    db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, condition))
+    db.session.commit()
+
+
+# TTL eviction, at most once per IDEMPOTENCY_PURGE_INTERVAL seconds per process
+def purge_expired():
+    interval = current_app.config["IDEMPOTENCY_PURGE_INTERVAL"]
+    if time.monotonic() - _last_purge[0] < interval:
+        return
+    _last_purge[0] = time.monotonic()
+    # Uses the expires_at index
+    db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.utcnow()))
+    db.session.commit()
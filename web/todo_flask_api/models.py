@@ -2,6 +2,7 @@
 
 from database import db
 from datetime import datetime
+from sqlalchemy import text
 
 # Define Task model class for SQLAlchemy ORM
 class Task(db.Model):
@@ -18,3 +19,101 @@ class Task(db.Model):
     # Default value set to current UTC time when object is created
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Row version - starts at 1 and is incremented by SQLite on every UPDATE,
+    # used to build the task's ETag
+    version = db.Column(db.Integer, nullable=False, default=1, onupdate=text("version + 1"))
+
+    # Last modification timestamp (set on insert and on every UPDATE)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Position of the task's latest change in the global change sequence,
+    # assigned by the change-tracking triggers (used by GET /tasks/changes)
+    change_seq = db.Column(db.Integer, nullable=False, default=0)
+
+    # Composite index backing keyset pagination on (created_at, id),
+    # an index on title for prefix filtering and one on change_seq for delta sync
+    __table_args__ = (
+        db.Index('ix_task_created_at_id', 'created_at', 'id'),
+        db.Index('ix_task_title', 'title'),
+        db.Index('ix_task_change_seq', 'change_seq'),
+    )
+
+
+# Tombstone left behind by a deleted task so sync clients learn about the deletion
+class TaskTombstone(db.Model):
+    __tablename__ = 'task_tombstone'
+
+    # Id of the deleted task
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Change sequence number of the deletion
+    change_seq = db.Column(db.Integer, nullable=False, index=True)
+
+    # When the task was deleted
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# Collection-level change counter (one row per table, bumped by triggers)
+class CollectionVersion(db.Model):
+    name = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Stored responses for requests sent with an Idempotency-Key header (see idempotency.py)
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_key'
+
+    # Client-chosen key and a hash of the request it was first used with
+    key = db.Column(db.String(255), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+
+    # Stored response; status stays NULL while the first request is still running
+    status = db.Column(db.Integer, nullable=True)
+    mimetype = db.Column(db.String(64), nullable=True)
+    body = db.Column(db.LargeBinary, nullable=True)
+
+    # When the key was claimed and when its record may be evicted
+    created_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    # Index for TTL eviction; WITHOUT ROWID keeps the table clustered on the key
+    __table_args__ = (
+        db.Index('ix_idempotency_key_expires_at', 'expires_at'),
+        {'sqlite_with_rowid': False},
+    )
+
+
+# SQL that seeds the 'task' counter row and installs the change-tracking triggers.
+# Every write bumps the counter; the new value doubles as the change sequence number
+# stamped on the task (or on its tombstone when it is deleted).
+CURRENT_SEQ = "(SELECT version FROM collection_version WHERE name = 'task')"
+
+COLLECTION_VERSION_DDL = [
+    "INSERT OR IGNORE INTO collection_version(name, version) VALUES ('task', 0)",
+    # Triggers from before change tracking existed
+    "DROP TRIGGER IF EXISTS task_version_ai",
+    "DROP TRIGGER IF EXISTS task_version_au",
+    "DROP TRIGGER IF EXISTS task_version_ad",
+    f"""CREATE TRIGGER IF NOT EXISTS task_change_ai AFTER INSERT ON task BEGIN
+        UPDATE collection_version SET version = version + 1 WHERE name = 'task';
+        UPDATE task SET change_seq = {CURRENT_SEQ} WHERE id = new.id;
+        DELETE FROM task_tombstone WHERE id = new.id;
+    END""",
+    # Only fires for user-visible columns, so the change_seq stamp above does not re-trigger it
+    f"""CREATE TRIGGER IF NOT EXISTS task_change_au AFTER UPDATE OF title, description ON task BEGIN
+        UPDATE collection_version SET version = version + 1 WHERE name = 'task';
+        UPDATE task SET change_seq = {CURRENT_SEQ} WHERE id = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS task_change_ad AFTER DELETE ON task BEGIN
+        UPDATE collection_version SET version = version + 1 WHERE name = 'task';
+        INSERT OR REPLACE INTO task_tombstone(id, change_seq, deleted_at)
+        VALUES (old.id, {CURRENT_SEQ}, CURRENT_TIMESTAMP);
+    END""",
+]
+
+
+# Create the counter row and triggers (safe to call on every startup)
+def init_collection_version():
+    with db.engine.begin() as conn:
+        for ddl in COLLECTION_VERSION_DDL:
+            conn.execute(text(ddl))
@@ -0,0 +1,161 @@
+# response_compression.py
+
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Default compression level per Content-Encoding (fast settings suited to dynamic responses)
+DEFAULT_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+# Response types worth compressing
+COMPRESSIBLE_MIMETYPES = (
+        "application/json",
+        "application/x-ndjson",
+        "text/html",
+        "text/plain",
+        "text/css",
+        "application/javascript"
+        )
+# Streamed responses are flushed to the client after this much input
+STREAM_FLUSH_BYTES = 64 * 1024
+
+
+# Incremental compressors share one interface: compress(data), flush() and finish()
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._obj.process(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+# Content-Encodings usable with the installed libraries (gzip is always there)
+def available_encodings():
+    encodings = {"gzip": GzipCompressor}
+    if brotli is not None:
+        encodings["br"] = BrotliCompressor
+    if zstandard is not None:
+        encodings["zstd"] = ZstdCompressor
+    return encodings
+
+
+# Compress a whole body in one go
+def compress(encoding, level, data):
+    compressor = available_encodings()[encoding](level)
+    return compressor.compress(data) + compressor.finish()
+
+
+# Compress a streamed (chunked) body chunk by chunk
+# Output is flushed every STREAM_FLUSH_BYTES of input so clients keep receiving data
+def compress_stream(chunks, compressor):
+    pending = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            out = compressor.compress(chunk)
+            pending += len(chunk)
+            if pending >= STREAM_FLUSH_BYTES:
+                out += compressor.flush()
+                pending = 0
+            if out:
+                yield out
+        yield compressor.finish()
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+
+# Compress responses negotiated through Accept-Encoding
+# (config: COMPRESSION, COMPRESSION_MIN_SIZE, COMPRESSION_LEVELS, COMPRESSION_ENCODINGS, COMPRESSION_MIMETYPES)
+def init_compression(app):
+    app.config.setdefault("COMPRESSION", True)
+    app.config.setdefault("COMPRESSION_MIN_SIZE", 1024)
+    app.config.setdefault("COMPRESSION_LEVELS", {})  # overrides for DEFAULT_LEVELS
+    app.config.setdefault("COMPRESSION_ENCODINGS", ("zstd", "br", "gzip"))  # server preference order
+    app.config.setdefault("COMPRESSION_MIMETYPES", COMPRESSIBLE_MIMETYPES)
+    if not app.config["COMPRESSION"]:
+        return
+
+    encodings = available_encodings()
+    preferred = [e for e in app.config["COMPRESSION_ENCODINGS"] if e in encodings]
+    levels = {**DEFAULT_LEVELS, **app.config["COMPRESSION_LEVELS"]}
+    min_size = app.config["COMPRESSION_MIN_SIZE"]
+    mimetypes = set(app.config["COMPRESSION_MIMETYPES"])
+
+    @app.after_request
+    def compress_response(response):
+        # Leave alone: other types, errors/304s, HEAD, already encoded bodies (e.g. /assets/) and files
+        if (
+                response.mimetype not in mimetypes
+                or response.status_code != 200
+                or request.method == "HEAD"
+                or "Content-Encoding" in response.headers
+                or response.direct_passthrough
+                ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = next((e for e in preferred if request.accept_encodings[e]), None)
+        if encoding is None:
+            return response   # Client accepts none of them (or identity only)
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encodings[encoding](levels[encoding]))
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response   # Too small to be worth the CPU
+            response.set_data(compress(encoding, levels[encoding], data))
+
+        response.headers["Content-Encoding"] = encoding
+        # The ETag names the uncompressed representation; weak comparison keeps 304s working
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -1,13 +1,25 @@
-from flask import Blueprint, request
+from datetime import datetime
+from flask import Blueprint, Response, current_app, request
 from helpers import *    # Import helper functions like send_response, missing_fields, etc.
-from models import Task  # Import the Task model class
+from models import Task, TaskTombstone, CollectionVersion  # Task model, tombstones and change counter
+from sqlalchemy import delete, insert, select, tuple_, update
 from database import db  # Import the SQLAlchemy db instance
+from events import get_broker, publish_task_event  # Change notifications for GET /tasks/events
+from write_behind import get_write_behind  # Optional queued task creation
+from idempotency import idempotent  # Idempotency-Key support for POST /tasks/
+
+# Columns returned by list endpoints, selected as plain tuples instead of Task objects
+TASK_COLUMNS = (Task.id, Task.title, Task.description, Task.created_at)
+
+# Columns returned by the delta sync endpoint
+SYNC_COLUMNS = TASK_COLUMNS + (Task.updated_at,)
 
 # Create a Blueprint named "tasks", all routes here will be prefixed with "/tasks"
 bp = Blueprint("tasks", __name__, url_prefix="/tasks")
 
 # POST /tasks/ - Create a new task
 @bp.route("/", methods=["POST"])
+@idempotent   # Retries with the same Idempotency-Key replay the first response
 def create_task():
     data = request.get_json()  # Parse JSON body from request
 
@@ -17,26 +29,137 @@ def create_task():
         # Return 400 Bad Request with message about missing fields
         return send_response(msg=f"Request incomplete. Missing fields: {missing}", status=400, success=False)
 
+    # Reject wrong types up front: a queued entry the database refuses would only fail at flush time
+    invalid = invalid_task_fields(data)
+    if invalid:
+        return send_response(msg=invalid, status=422, success=False)
+
+    # Write-behind mode: acknowledge once the task is in the durable log;
+    # it reaches the database (and gets its id) with the next batched flush
+    queue = get_write_behind()
+    if queue is not None:
+        entry = queue.append(data['title'], data.get('description'))
+        return send_response(
+            data={'id': None, 'title': entry['title'], 'description': entry['description'], 'created_at': datetime.fromisoformat(entry['created_at'])},
+            msg="Task queued",
+            status=202
+        )
+
     # Create new Task object from data
     task = Task(title=data['title'], description=data.get('description'))
 
     # Add new task to database session and commit (save)
     db.session.add(task)
     db.session.commit()
+    publish_task_event('create', serialize_obj(task))
 
     # Return success response with serialized new task and HTTP 201 Created
     return send_response(data=serialize_obj(task), msg="Task created", status=201)
 
 
-# GET /tasks/ - Retrieve all tasks, ordered by creation date descending
+# GET /tasks/ - Retrieve tasks, ordered by creation date descending
+# Optional query parameters (all evaluated in the database):
+#   since / until - ISO dates bounding created_at
+#   title         - title prefix
+#   limit / cursor - keyset pagination on (created_at, id)
 @bp.route("/", methods=["GET"])
 def get_all_tasks():
-    tasks = Task.query.order_by(Task.created_at.desc()).all()  # Query all tasks ordered newest first
+    # Revalidate against the collection counter before touching the task table
+    version = db.session.get(CollectionVersion, 'task')
+    etag = collection_etag('tasks', version.version if version else 0)
+    cached = not_modified(etag)
+    if cached:
+        return cached   # 304 Not Modified, nothing queried or serialized
+
+    # Newest first; id breaks ties between tasks created in the same instant
+    query = select(*TASK_COLUMNS).order_by(Task.created_at.desc(), Task.id.desc())
+
+    # Date range filters
+    for name, compare in (('since', Task.created_at.__ge__), ('until', Task.created_at.__lt__)):
+        if name in request.args:
+            moment = parse_datetime(request.args[name])
+            if moment is None:
+                return send_response(msg=f"Invalid '{name}' date.", status=400, success=False)
+            query = query.where(compare(moment))
+
+    # Title prefix filter as an index-friendly range
+    prefix = request.args.get('title')
+    if prefix:
+        query = query.where(Task.title >= prefix)
+        upper = prefix_upper_bound(prefix)
+        if upper is not None:
+            query = query.where(Task.title < upper)
+
+    # Without limit/cursor every matching task is returned, as before
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        tasks = db.session.execute(query).all()
+
+        # If no tasks found, message will reflect that; else "All tasks retrieved."
+        return send_response(
+            data=serialize_rows(tasks),
+            msg="No tasks registered." if not tasks else "All tasks retrieved.",
+            status=200,
+            headers=etag_headers(etag)
+        )
+
+    limit = parse_limit(request.args.get('limit'))
+    if limit is None:
+        return send_response(msg="Invalid 'limit'.", status=400, success=False)
+
+    # Continue strictly after the last (created_at, id) of the previous page
+    cursor = request.args.get('cursor')
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            return send_response(msg="Invalid 'cursor'.", status=400, success=False)
+        query = query.where(tuple_(Task.created_at, Task.id) < tuple_(*position))
+
+    # Fetch one extra row to know whether another page exists
+    tasks = db.session.execute(query.limit(limit + 1)).all()
+    has_more = len(tasks) > limit
+    tasks = tasks[:limit]
+
+    return send_response(
+        data=serialize_rows(tasks),
+        msg="Tasks page retrieved.",
+        status=200,
+        headers=etag_headers(etag),
+        meta={'limit': limit, 'next_cursor': encode_cursor(tasks[-1]) if has_more else None}
+    )
+
+
+# GET /tasks/changes?since=<token> - Delta sync
+# Returns the tasks created or modified and the ids deleted after the given sync token,
+# plus a new token to send next time. since=0 (or a token from another database) returns
+# a full snapshot with "reset": true.
+@bp.route("/changes", methods=["GET"])
+def get_task_changes():
+    since = parse_sync_token(request.args.get('since', '0'))
+    if since is None:
+        return send_response(msg="Invalid 'since' token.", status=400, success=False)
+
+    # Read the current position first; only changes up to it are returned so a
+    # write landing mid-request is picked up by the next sync instead of being lost
+    version = db.session.get(CollectionVersion, 'task')
+    token = version.version if version else 0
+    reset = since == 0 or since > token
+    if reset:
+        since = 0
+
+    changed = db.session.execute(
+        select(*SYNC_COLUMNS)
+        .where(Task.change_seq > since, Task.change_seq <= token)
+        .order_by(Task.created_at.desc(), Task.id.desc())
+    ).all()
+
+    # A full snapshot already omits deleted tasks, so tombstones are only needed for deltas
+    deleted = [] if reset else list(db.session.scalars(
+        select(TaskTombstone.id).where(TaskTombstone.change_seq > since, TaskTombstone.change_seq <= token)
+    ))
 
-    # If no tasks found, message will reflect that; else "All tasks retrieved."
     return send_response(
-        data=serialize_obj_list(tasks),
-        msg="No tasks registered." if not tasks else "All tasks retrieved.",
+        data={'token': str(token), 'reset': reset, 'tasks': serialize_rows(changed), 'deleted': deleted},
+        msg="Changes retrieved.",
         status=200
     )
 
@@ -44,6 +167,15 @@ def get_all_tasks():
 # GET /tasks/<id> - Retrieve a specific task by ID
 @bp.route("/<int:id>", methods=["GET"])
 def get_task_by_id(id):
+    # Look up only the version columns first so unchanged tasks short-circuit to 304
+    stamp = db.session.execute(
+        select(Task.created_at, Task.version).where(Task.id == id)
+    ).first()
+    if stamp:
+        cached = not_modified(task_etag(id, *stamp))
+        if cached:
+            return cached
+
     task = find_by_id(model=Task, obj_id=id)  # Fetch task or None if not found
 
     if not task:
@@ -51,7 +183,8 @@ def get_task_by_id(id):
         return send_response(msg="Task not found.", status=404, success=False)
 
     # Return serialized task data with success message
-    return send_response(data=serialize_obj(task), msg="Task retrieved", status=200)
+    etag = task_etag(task.id, task.created_at, task.version)
+    return send_response(data=serialize_obj(task), msg="Task retrieved", status=200, headers=etag_headers(etag))
 
 
 # DELETE /tasks/<id> - Delete a specific task by ID
@@ -66,6 +199,7 @@ def delete_task(id):
     # Delete task from database and commit changes
     db.session.delete(task)
     db.session.commit()
+    publish_task_event('delete', {'id': id})
 
     # Return success response with deleted task data
     return send_response(data=serialize_obj(task), msg="Task deleted successfully.", status=200)
@@ -82,6 +216,11 @@ def replace_task(id):
         # Return 400 if fields missing
         return send_response(msg=f"Request incomplete. Missing fields: {missing}", status=400, success=False)
 
+    # Reject wrong types (e.g. a null title) before they reach the NOT NULL column
+    invalid = invalid_task_fields(data)
+    if invalid:
+        return send_response(msg=invalid, status=422, success=False)
+
     task = find_by_id(model=Task, obj_id=id)  # Fetch task to update
     if not task:
         # Return 404 if not found
@@ -93,6 +232,7 @@ def replace_task(id):
 
     # Commit changes to database
     db.session.commit()
+    publish_task_event('replace', serialize_obj(task))
 
     # Return updated task data with success message
     return send_response(data=serialize_obj(task), msg="Task replaced successfully.", status=200)
@@ -112,6 +252,11 @@ def patch_task(id):
     title = data.get('title')
     description = data.get('description')
 
+    # Reject wrong types for the fields that will be written
+    invalid = invalid_task_fields({f: v for f, v in (('title', title), ('description', description)) if v is not None})
+    if invalid:
+        return send_response(msg=invalid, status=422, success=False)
+
     # Update only fields that are provided (not None)
     if title is not None:
         task.title = title
@@ -120,6 +265,133 @@ def patch_task(id):
 
     # Commit the partial updates to database
     db.session.commit()
+    publish_task_event('patch', serialize_obj(task))
 
     # Return updated task with success message
     return send_response(data=serialize_obj(task), msg="Task updated successfully.", status=200)
+
+
+# POST /tasks/batch - Apply many create/replace/patch/delete operations in one transaction
+# Body: [{"op": "create", "title": ...}, {"op": "patch", "id": 3, "title": ...}, {"op": "delete", "id": 4}, ...]
+@bp.route("/batch", methods=["POST"])
+def batch_tasks():
+    operations = request.get_json()  # Parse JSON array of operations
+
+    # Validate the envelope before touching the database
+    if not isinstance(operations, list):
+        return send_response(msg="Request must be a JSON array of operations.", status=400, success=False)
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return send_response(msg=f"At most {MAX_BATCH_OPERATIONS} operations per batch.", status=400, success=False)
+
+    results = [None] * len(operations)
+    creates, updates, deletes = [], [], []
+
+    # One IN query finds which referenced tasks exist
+    referenced = {
+        op.get('id') for op in operations
+        if isinstance(op, dict) and is_task_id(op.get('id'))
+    }
+    live = set(db.session.scalars(select(Task.id).where(Task.id.in_(referenced)))) if referenced else set()
+
+    # Sort operations into bulk statements, recording failures per item
+    for index, op in enumerate(operations):
+        kind = op.get('op') if isinstance(op, dict) else None
+
+        if kind == 'create':
+            if 'title' not in op:
+                results[index] = batch_result(index, kind, 400, msg="Missing fields: ['title']")
+                continue
+            invalid = invalid_task_fields(op)
+            if invalid:
+                results[index] = batch_result(index, kind, 422, msg=invalid)
+                continue
+            creates.append((index, {'title': op['title'], 'description': op.get('description')}))
+            continue
+
+        if kind not in ('replace', 'patch', 'delete'):
+            results[index] = batch_result(index, kind, 400, msg="Unknown operation.")
+            continue
+
+        task_id = op.get('id')
+        if not is_task_id(task_id) or task_id not in live:
+            results[index] = batch_result(index, kind, 404, task_id, "Task not found.")
+            continue
+
+        if kind == 'delete':
+            live.discard(task_id)   # Later operations on this id report 404
+            deletes.append(task_id)
+            results[index] = batch_result(index, kind, 200, task_id, "Task deleted successfully.")
+        elif kind == 'replace':
+            if 'title' not in op:
+                results[index] = batch_result(index, kind, 400, task_id, "Missing fields: ['title']")
+                continue
+            invalid = invalid_task_fields(op)
+            if invalid:
+                results[index] = batch_result(index, kind, 422, task_id, invalid)
+                continue
+            updates.append({'id': task_id, 'title': op['title'], 'description': op.get('description')})
+            results[index] = batch_result(index, kind, 200, task_id, "Task replaced successfully.")
+        else:
+            # Same rule as PATCH /tasks/<id>: only non-null fields are changed
+            values = {f: op[f] for f in ('title', 'description') if op.get(f) is not None}
+            invalid = invalid_task_fields(values)
+            if invalid:
+                results[index] = batch_result(index, kind, 422, task_id, invalid)
+                continue
+            if values:
+                updates.append({'id': task_id, **values})
+            results[index] = batch_result(index, kind, 200, task_id, "Task updated successfully.")
+
+    # Batched INSERT ... RETURNING keeps ids in the order of the request
+    if creates:
+        stmt = insert(Task).returning(Task.id, sort_by_parameter_order=True)
+        new_ids = db.session.scalars(stmt, [values for _, values in creates]).all()
+        for (index, _), task_id in zip(creates, new_ids):
+            results[index] = batch_result(index, 'create', 201, task_id, "Task created")
+
+    # Bulk UPDATE by primary key, then one DELETE ... WHERE id IN (...)
+    if updates:
+        db.session.execute(update(Task), updates)
+    if deletes:
+        db.session.execute(delete(Task).where(Task.id.in_(deletes)), execution_options={'synchronize_session': False})
+
+    # Single commit (and fsync) for the whole batch
+    db.session.commit()
+    publish_batch_events(results)
+
+    return send_response(data=results, msg="Batch applied.", status=200)
+
+
+# Broadcast the successful operations of a batch, reading the final rows in one query
+def publish_batch_events(results):
+    broker = get_broker()
+    if broker is None or not len(broker):
+        return   # Nobody listening
+    applied = [r for r in results if r['status'] in (200, 201)]
+    changed = {r['id'] for r in applied if r['op'] != 'delete'}
+    rows = {}
+    if changed:
+        rows = {t.id: t._asdict() for t in db.session.execute(select(*TASK_COLUMNS).where(Task.id.in_(changed)))}
+    for r in applied:
+        if r['op'] == 'delete':
+            publish_task_event('delete', {'id': r['id']})
+        elif r['id'] in rows:   # Skip tasks deleted later in the same batch
+            publish_task_event(r['op'], rows[r['id']])
+
+
+# GET /tasks/events - Server-Sent Events stream of task changes
+# Emits "create", "replace", "patch" and "delete" events whose data is the task
+# (just {"id": ...} for deletes). A client that falls too far behind receives a
+# "dropped" event and the stream ends; it should resync with GET /tasks/changes.
+@bp.route("/events", methods=["GET"])
+def task_events():
+    broker = get_broker()
+    if broker is None:
+        return send_response(msg="Events are disabled.", status=404, success=False)
+
+    subscriber = broker.subscribe()
+    stream = broker.stream(subscriber, current_app.config['TASK_EVENTS_KEEPALIVE'])
+    return Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'   # Keep reverse proxies (nginx) from buffering the stream
+    })
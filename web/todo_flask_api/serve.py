@@ -0,0 +1,281 @@
+# serve.py
+#
+# Prefork production server for the Task Manager (Unix only).
+#
+# The master process opens the listening socket and forks --workers processes
+# that accept on it. Each worker imports the app after the fork, warms it up and
+# serves requests on a fixed pool of --threads threads. GET /tasks/events streams
+# run on threads of their own (at most --max-streams) so they never tie up the pool.
+#
+# Signals sent to the master:
+#     SIGHUP           graceful reload: start fresh workers (new code), then retire the old ones
+#                      (with --write-behind the old worker is stopped first: one log, one writer)
+#     SIGTERM, SIGINT  graceful shutdown: workers close event streams, give in-flight
+#                      requests up to --graceful-timeout seconds and exit
+#
+# Usage: python serve.py --port 8000 --workers 4 --threads 8
+
+import argparse
+import logging
+import os
+import re
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer
+
+# Directory holding app.py and the other app modules
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# Request line of the one endpoint that stays open for as long as the client is connected
+EVENT_STREAM = re.compile(rb"GET /tasks/events[ ?]")
+
+# Sent instead of a stream when --max-streams are already open
+STREAMS_BUSY = b"HTTP/1.1 503 Service Unavailable\r\nRetry-After: 5\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+
+# Werkzeug's threaded server starts a thread per connection; this one uses a bounded pool.
+# An event stream would hold a pool thread until its client leaves, so a few open
+# browser tabs could starve every other request: streams get their own threads instead.
+class PooledWSGIServer(BaseWSGIServer):
+    def __init__(self, *args, threads=1, max_streams=100, **kwargs):
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="request")
+        self.streams = threading.BoundedSemaphore(max_streams)
+        self._active = 0                    # Accepted connections not finished yet
+        self._idle = threading.Condition()  # Notified whenever one finishes
+        super().__init__(*args, **kwargs)
+
+    def process_request(self, request, client_address):
+        with self._idle:
+            self._active += 1
+        self.pool.submit(self._dispatch, request, client_address)
+
+    # Runs on a pool thread: hands event streams over to a thread of their own
+    def _dispatch(self, request, client_address):
+        if not self._is_stream(request):
+            self._handle(request, client_address)
+        elif self.streams.acquire(blocking=False):
+            threading.Thread(target=self._handle_stream, args=(request, client_address),
+                             name="stream", daemon=True).start()
+        else:
+            try:
+                request.sendall(STREAMS_BUSY)
+            except OSError:
+                pass
+            self._finish(request)
+
+    # Peek at the request line without consuming it (the handler still reads it)
+    @staticmethod
+    def _is_stream(request):
+        try:
+            head = request.recv(len(b"GET /tasks/events "), socket.MSG_PEEK)
+        except OSError:
+            return False
+        return EVENT_STREAM.match(head) is not None
+
+    def _handle_stream(self, request, client_address):
+        try:
+            self._handle(request, client_address)
+        finally:
+            self.streams.release()
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self._finish(request)
+
+    def _finish(self, request):
+        self.shutdown_request(request)
+        with self._idle:
+            self._active -= 1
+            self._idle.notify_all()
+
+    # Wait up to timeout seconds for accepted connections to finish; False if some did not
+    def drain(self, timeout):
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._active:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+
+# Import the Flask app (only ever called in a child process, so reloads pick up new code)
+def load_app():
+    sys.path.insert(0, BASE_DIR)
+    from app import app
+    return app
+
+
+# Open the connection pool and run a first query before accepting requests
+def warm_up(app):
+    from sqlalchemy import select
+    from database import db
+    from routes import TASK_COLUMNS
+
+    with app.app_context():
+        db.session.execute(select(*TASK_COLUMNS).limit(1)).all()
+        db.session.remove()
+
+
+# Body of one worker process
+def run_worker(sock, args):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The master decides when to stop
+    if not args.access_log:
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    app = load_app()
+    warm_up(app)
+    server = PooledWSGIServer(args.host, args.port, app, threads=args.threads,
+                              max_streams=args.max_streams, fd=sock.fileno())
+
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    server.serve_forever()
+
+    # Event streams never finish on their own: end them (EventSource reconnects to
+    # another worker), then let in-flight requests finish, within a time limit
+    broker = app.extensions.get('task_events')
+    if broker is not None:
+        broker.close()
+    if not server.drain(args.graceful_timeout):
+        print(f"Worker {os.getpid()}: requests still running after {args.graceful_timeout}s, exiting anyway",
+              file=sys.stderr)
+    server.pool.shutdown(wait=False)
+    server.server_close()
+
+    # os._exit() skips atexit, so flush the write-behind queue here
+    queue = app.extensions.get('write_behind')
+    if queue is not None:
+        queue.close()
+
+
+# Schema setup runs once per (re)load in a short-lived child, never in the master
+def run_init():
+    pid = os.fork()
+    if pid == 0:
+        from database import db
+        from models import init_collection_version
+
+        os.environ["TASKS_WRITE_BEHIND"] = "0"  # Leave the log to the worker that owns it
+        app = load_app()
+        with app.app_context():
+            db.create_all()
+            init_collection_version()
+        os._exit(0)
+    _, status = os.waitpid(pid, 0)
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise SystemExit("Database initialization failed")
+
+
+# Fork one worker; returns its pid
+def spawn(sock, args):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(sock, args)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+    return pid
+
+
+# SIGTERM the given workers and wait until they have exited
+def stop_workers(pids):
+    for pid in pids:
+        os.kill(pid, signal.SIGTERM)
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefork production server for the Task Manager")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: CPU count)")
+    parser.add_argument("--threads", type=int, default=4, help="request threads per worker")
+    parser.add_argument("--max-streams", type=int, default=100, help="open GET /tasks/events streams per worker")
+    parser.add_argument("--graceful-timeout", type=float, default=30,
+                        help="seconds a stopping worker waits for in-flight requests")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--access-log", action="store_true", help="log every request (slower)")
+    parser.add_argument("--write-behind", action="store_true", help="queue task creates (see write_behind.py)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BASE_DIR)
+    # app.py reads the flag from the environment, so the master never has to import the app
+    if args.write_behind:
+        os.environ["TASKS_WRITE_BEHIND"] = "1"
+    write_behind = os.environ.get("TASKS_WRITE_BEHIND") == "1"
+    if write_behind and args.workers > 1:
+        # The write-behind log and its flusher belong to a single process
+        raise SystemExit("Write-behind requires --workers 1")
+    sock = socket.create_server((args.host, args.port), backlog=args.backlog)
+    sock.set_inheritable(True)
+    run_init()
+
+    state = {"reload": False, "stop": False}
+    signal.signal(signal.SIGHUP, lambda *_: state.update(reload=True))
+    signal.signal(signal.SIGTERM, lambda *_: state.update(stop=True))
+    signal.signal(signal.SIGINT, lambda *_: state.update(stop=True))
+
+    workers = {spawn(sock, args) for _ in range(args.workers)}
+    retiring = set()
+    print(f"Serving on http://{args.host}:{args.port} with {args.workers} workers x {args.threads} threads")
+
+    while True:
+        if state["stop"]:
+            stop_workers(workers | retiring)
+            break
+
+        if state["reload"]:
+            state["reload"] = False
+            if write_behind:
+                # Two queues must never share the log: the old worker flushes and exits
+                # before the new one replays it (connections wait in the socket backlog)
+                stop_workers(workers | retiring)
+                retiring = set()
+                run_init()
+                workers = {spawn(sock, args) for _ in range(args.workers)}
+            else:
+                run_init()
+                retiring |= workers
+                workers = {spawn(sock, args) for _ in range(args.workers)}
+                for pid in retiring:
+                    os.kill(pid, signal.SIGTERM)
+
+        # Reap exited workers without blocking
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            pid = 0
+        if pid in retiring:
+            retiring.discard(pid)
+        elif pid in workers:
+            # A worker died unexpectedly: replace it
+            workers.discard(pid)
+            workers.add(spawn(sock, args))
+        if not pid:
+            time.sleep(0.2)
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
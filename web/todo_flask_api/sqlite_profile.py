@@ -0,0 +1,58 @@
+# sqlite_profile.py
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# PRAGMAs run on every new SQLite connection
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',      # Readers no longer block writers (and vice versa)
+    'synchronous': 'NORMAL',    # fsync on checkpoint only; safe with WAL
+    'busy_timeout': 5000,       # Wait up to 5s for a lock instead of failing
+    'cache_size': -64000,       # ~64 MB page cache per connection
+    'mmap_size': 268435456,     # Memory-map up to 256 MB of the database file
+    'temp_store': 'MEMORY',     # Keep temp tables/indexes in memory
+}
+
+# Connection pool settings suited to a multi-threaded server
+DEFAULT_POOL_OPTIONS = {
+    'pool_size': 10,            # Connections kept open
+    'max_overflow': 20,         # Extra connections allowed under burst
+    'pool_timeout': 30,         # Seconds to wait for a free connection
+    'pool_recycle': 3600,       # Reopen connections after an hour
+}
+
+
+# True for file-backed SQLite URIs (in-memory databases use a StaticPool)
+def is_file_sqlite(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+# Build SQLALCHEMY_ENGINE_OPTIONS for the given URI, with optional overrides
+def sqlite_engine_options(uri, **overrides):
+    if not is_file_sqlite(uri):
+        return dict(overrides)
+    options = {**DEFAULT_POOL_OPTIONS, 'connect_args': {'check_same_thread': False}}
+    options.update(overrides)
+    return options
+
+
+# Return a "connect" event listener that applies the given PRAGMAs
+def make_pragma_listener(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return set_pragmas
+
+
+# Attach the PRAGMA listener to every SQLite engine of the Flask-SQLAlchemy instance
+# (app.config['SQLITE_PRAGMAS'] overrides DEFAULT_PRAGMAS)
+def apply_sqlite_pragmas(app, db):
+    pragmas = {**DEFAULT_PRAGMAS, **app.config.get('SQLITE_PRAGMAS', {})}
+    listener = make_pragma_listener(pragmas)
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', listener)
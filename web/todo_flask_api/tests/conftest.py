@@ -0,0 +1,51 @@
+# tests/conftest.py
+#
+# Run from web/todo_flask_api with: python -m pytest tests
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Make the app modules (database, models, routes...) importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask import Flask
+
+from database import db
+from events import init_events
+from idempotency import init_idempotency
+from json_provider import FastJSONProvider
+from models import init_collection_version
+from routes import bp as tasks_bp
+from sqlite_profile import apply_sqlite_pragmas, sqlite_engine_options
+from write_behind import init_write_behind
+
+
+# App configured like app.py, on a fresh database file in the test's tmp_path
+@pytest.fixture
+def app(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'tasks.db'}"
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_engine_options(uri)
+    app.config['WRITE_BEHIND_LOG'] = str(tmp_path / 'write-behind.log')
+    db.init_app(app)
+    apply_sqlite_pragmas(app, db)
+    init_events(app)
+    init_write_behind(app)   # WRITE_BEHIND is off: tests create their own queues
+    init_idempotency(app)
+    app.register_blueprint(tasks_bp)
+    with app.app_context():
+        db.create_all()
+        init_collection_version()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
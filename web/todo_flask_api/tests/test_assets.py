@@ -0,0 +1,40 @@
+# tests/test_assets.py
+
+import gzip
+
+import pytest
+
+from assets import CachedPage
+
+HTML = '<!doctype html><title>Tasks</title>' + '<p>hello</p>' * 50
+
+
+@pytest.fixture
+def page():
+    return CachedPage(HTML)
+
+
+def test_plain_and_gzip_bodies(app, page):
+    with app.test_request_context('/'):
+        plain = page.response()
+    with app.test_request_context('/', headers={'Accept-Encoding': 'gzip'}):
+        packed = page.response()
+
+    assert plain.get_data(as_text=True) == HTML
+    assert packed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(packed.get_data()).decode() == HTML
+    assert plain.headers['ETag'] == packed.headers['ETag'] == f'"{page.etag}"'
+
+
+# Compression middleware weakens the ETag, so browsers send back W/"..."
+@pytest.mark.parametrize('validator', ['"{}"', 'W/"{}"', '"other", W/"{}"', '*'])
+def test_matching_validator_gives_304(app, page, validator):
+    with app.test_request_context('/', headers={'If-None-Match': validator.format(page.etag)}):
+        response = page.response()
+    assert response.status_code == 304
+    assert response.get_data() == b''
+
+
+def test_stale_validator_gets_the_page(app, page):
+    with app.test_request_context('/', headers={'If-None-Match': 'W/"stale"'}):
+        assert page.response().status_code == 200
@@ -0,0 +1,43 @@
+# tests/test_batch.py
+
+
+def create(client, title):
+    return client.post('/tasks/', json={'title': title}).get_json()['data']['id']
+
+
+def batch(client, operations):
+    response = client.post('/tasks/batch', json=operations)
+    assert response.status_code == 200
+    return [(r['status'], r['id']) for r in response.get_json()['data']]
+
+
+def test_boolean_id_does_not_address_task_one(client):
+    assert create(client, 'one') == 1
+
+    results = batch(client, [
+        {'op': 'delete', 'id': True},
+        {'op': 'patch', 'id': True, 'title': 'changed'},
+        {'op': 'replace', 'id': True, 'title': 'changed'},
+        {'op': 'delete', 'id': False},
+    ])
+
+    assert [status for status, _ in results] == [404, 404, 404, 404]
+    assert client.get('/tasks/1').get_json()['data']['title'] == 'one'
+
+
+def test_partial_failures_are_reported_per_item(client):
+    kept, gone = create(client, 'kept'), create(client, 'gone')
+
+    results = batch(client, [
+        {'op': 'create', 'title': 'new'},
+        {'op': 'create'},
+        {'op': 'create', 'title': None},
+        {'op': 'patch', 'id': kept, 'title': 'kept 2'},
+        {'op': 'delete', 'id': gone},
+        {'op': 'delete', 'id': gone},
+        {'op': 'explode'},
+    ])
+
+    assert [status for status, _ in results] == [201, 400, 422, 200, 200, 404, 400]
+    titles = sorted(t['title'] for t in client.get('/tasks/').get_json()['data'])
+    assert titles == ['kept 2', 'new']
@@ -0,0 +1,65 @@
+# tests/test_changes.py
+
+
+def create(client, title):
+    return client.post('/tasks/', json={'title': title}).get_json()['data']['id']
+
+
+def changes(client, since):
+    response = client.get('/tasks/changes', query_string={'since': since})
+    assert response.status_code == 200
+    return response.get_json()['data']
+
+
+def test_delta_returns_changed_tasks_and_tombstones(client):
+    kept, patched, deleted = create(client, 'kept'), create(client, 'patched'), create(client, 'deleted')
+    token = changes(client, 0)['token']
+
+    client.patch(f'/tasks/{patched}', json={'title': 'patched again'})
+    client.delete(f'/tasks/{deleted}')
+    delta = changes(client, token)
+
+    assert not delta['reset']
+    assert [t['title'] for t in delta['tasks']] == ['patched again']
+    assert delta['deleted'] == [deleted]
+    assert int(delta['token']) > int(token)
+
+    # Nothing new since the latest token
+    empty = changes(client, delta['token'])
+    assert (empty['tasks'], empty['deleted'], empty['token']) == ([], [], delta['token'])
+
+
+def test_reused_id_is_reported_as_changed_not_deleted(client):
+    create(client, 'a')
+    last = create(client, 'b')
+    token = changes(client, 0)['token']
+
+    # SQLite hands the highest rowid out again after it is deleted
+    client.delete(f'/tasks/{last}')
+    assert create(client, 'c') == last
+
+    delta = changes(client, token)
+    assert delta['deleted'] == []
+    assert [(t['id'], t['title']) for t in delta['tasks']] == [(last, 'c')]
+
+
+def test_snapshot_omits_tombstones(client):
+    create(client, 'a')
+    gone = create(client, 'b')
+    client.delete(f'/tasks/{gone}')
+
+    snapshot = changes(client, 0)
+    assert snapshot['reset']
+    assert snapshot['deleted'] == []
+    assert [t['title'] for t in snapshot['tasks']] == ['a']
+
+
+def test_token_from_another_database_resets(client):
+    create(client, 'a')
+    snapshot = changes(client, 10 ** 9)
+    assert snapshot['reset']
+    assert [t['title'] for t in snapshot['tasks']] == ['a']
+
+
+def test_invalid_token_is_rejected(client):
+    assert client.get('/tasks/changes?since=abc').status_code == 400
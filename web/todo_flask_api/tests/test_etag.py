@@ -0,0 +1,35 @@
+# tests/test_etag.py
+
+
+def create(client, title):
+    return client.post('/tasks/', json={'title': title}).get_json()['data']['id']
+
+
+def revalidate(client, url, etag):
+    return client.get(url, headers={'If-None-Match': etag})
+
+
+def test_task_etag_and_304(client):
+    url = f"/tasks/{create(client, 'a')}"
+    etag = client.get(url).headers['ETag']
+
+    assert revalidate(client, url, etag).status_code == 304
+    client.patch(url, json={'title': 'b'})
+    response = revalidate(client, url, etag)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_listing_etag_changes_on_write(client):
+    task_id = create(client, 'a')
+    etag = client.get('/tasks/').headers['ETag']
+    assert revalidate(client, '/tasks/', etag).status_code == 304
+
+    for write in (lambda: create(client, 'b'),
+                  lambda: client.put(f'/tasks/{task_id}', json={'title': 'c'}),
+                  lambda: client.post('/tasks/batch', json=[{'op': 'delete', 'id': task_id}])):
+        write()
+        response = revalidate(client, '/tasks/', etag)
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        assert revalidate(client, '/tasks/', etag).status_code == 304
@@ -0,0 +1,81 @@
+# tests/test_events.py
+
+from events import EventBroker
+
+
+def drain(subscriber):
+    messages = []
+    while not subscriber.queue.empty():
+        messages.append(subscriber.queue.get_nowait())
+    return messages
+
+
+def test_publish_queues_the_same_frame_for_every_subscriber():
+    broker = EventBroker(queue_size=10)
+    first, second = broker.subscribe(), broker.subscribe()
+
+    broker.publish('create', '{"id": 1}')
+
+    [a], [b] = drain(first), drain(second)
+    assert a is b   # Encoded once
+    assert a == b'id: 1\nevent: create\ndata: {"id": 1}\n\n'
+
+
+def test_overflowing_subscriber_is_dropped_without_blocking_others():
+    broker = EventBroker(queue_size=2)
+    slow, fast = broker.subscribe(), broker.subscribe()
+
+    for i in range(2):
+        broker.publish('create', str(i))
+        drain(fast)
+    broker.publish('create', '2')   # Third event: slow's queue is full
+
+    assert slow.dropped
+    assert len(broker) == 1
+    assert not fast.dropped
+    assert len(drain(fast)) == 1
+
+    # The stream only tells the client to resync (GET /tasks/changes), then ends
+    frames = list(broker.stream(slow, keepalive=0.01))
+    assert frames == [b'retry: 1000\n\n', b'event: dropped\ndata: {}\n\n']
+
+
+def test_keepalive_and_disconnect_unsubscribe():
+    broker = EventBroker(queue_size=10)
+    subscriber = broker.subscribe()
+    stream = broker.stream(subscriber, keepalive=0.01)
+
+    assert next(stream).startswith(b'retry:')
+    assert next(stream) == b': keep-alive\n\n'
+    assert len(broker) == 1
+
+    stream.close()   # What the server does when the client goes away
+    assert len(broker) == 0
+    broker.publish('create', '{}')
+    assert subscriber.queue.empty()
+
+
+def test_write_is_published_to_subscribers(app, client):
+    broker = app.extensions['task_events']
+    subscriber = broker.subscribe()
+
+    task_id = client.post('/tasks/', json={'title': 'a'}).get_json()['data']['id']
+    client.delete(f'/tasks/{task_id}')
+
+    frames = drain(subscriber)
+    assert [f.split(b'\n')[1] for f in frames] == [b'event: create', b'event: delete']
+    assert f'"id":{task_id}'.encode() in frames[1].replace(b' ', b'')
+
+
+def test_close_ends_open_and_later_streams():
+    broker = EventBroker(queue_size=10)
+    subscriber = broker.subscribe()
+    stream = broker.stream(subscriber, keepalive=60)
+    assert next(stream).startswith(b'retry:')
+
+    broker.close()   # Wakes the stream without waiting for the keep-alive
+    assert list(stream) == []
+    assert len(broker) == 0
+
+    late = broker.subscribe()
+    assert list(broker.stream(late, keepalive=60)) == [b'retry: 1000\n\n']
@@ -0,0 +1,44 @@
+# tests/test_idempotency.py
+
+from database import db
+from models import Task
+
+
+def count_tasks(app):
+    with app.app_context():
+        return db.session.query(Task).count()
+
+
+def test_retry_with_same_key_replays_first_response(app, client):
+    headers = {'Idempotency-Key': 'k1'}
+    first = client.post('/tasks/', json={'title': 'once'}, headers=headers)
+    second = client.post('/tasks/', json={'title': 'once'}, headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert second.data == first.data
+    assert count_tasks(app) == 1
+
+
+def test_same_key_with_different_body_is_rejected(app, client):
+    headers = {'Idempotency-Key': 'k2'}
+    client.post('/tasks/', json={'title': 'one'}, headers=headers)
+    response = client.post('/tasks/', json={'title': 'two'}, headers=headers)
+
+    assert response.status_code == 422
+    assert count_tasks(app) == 1
+
+
+def test_rejected_request_is_replayed_too(app, client):
+    headers = {'Idempotency-Key': 'k3'}
+    assert client.post('/tasks/', json={'title': None}, headers=headers).status_code == 422
+    response = client.post('/tasks/', json={'title': None}, headers=headers)
+
+    assert response.status_code == 422
+    assert response.headers['Idempotent-Replayed'] == 'true'
+    assert count_tasks(app) == 0
+
+
+def test_invalid_key_is_rejected(client):
+    response = client.post('/tasks/', json={'title': 'x'}, headers={'Idempotency-Key': 'k' * 256})
+    assert response.status_code == 400
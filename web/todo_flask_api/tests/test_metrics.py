@@ -0,0 +1,21 @@
+# tests/test_metrics.py
+
+import os
+import re
+
+from instrumentation import Metrics
+
+
+def test_metrics_are_labelled_with_the_worker_pid():
+    metrics = Metrics()
+    metrics.observe('GET', '/tasks/', 200, 0.002, 1, 0.001, 0.0005)
+    metrics.observe('GET', '/tasks/', 200, 0.2, 1, 0.001, 0.0005)
+    text = metrics.render()
+    worker = f'worker_pid="{os.getpid()}"'
+
+    assert text.startswith(f'# Metrics of worker process {os.getpid()} only\n')
+    assert f'http_requests_total{{{worker},method="GET",route="/tasks/",status="200"}} 2' in text
+    assert f'http_request_duration_seconds_bucket{{{worker},method="GET",route="/tasks/",le="0.005"}} 1' in text
+    # Every sample carries the label, so per-worker series never mix
+    samples = [line for line in text.splitlines() if not line.startswith('#')]
+    assert samples and all(re.match(rf'\w+{{{worker},', line) for line in samples)
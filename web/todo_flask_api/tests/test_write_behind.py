@@ -0,0 +1,118 @@
+# tests/test_write_behind.py
+
+import json
+
+import pytest
+
+from database import db
+from models import Task
+from write_behind import WriteBehindQueue, read_log
+
+
+# Queue whose background thread never flushes on its own: tests call flush() themselves
+def make_queue(app, **kwargs):
+    kwargs.setdefault('batch_size', 100)
+    kwargs.setdefault('interval', 3600)
+    return WriteBehindQueue(app, app.config['WRITE_BEHIND_LOG'], **kwargs)
+
+
+# Stop a queue the way a crash would: no final flush, no compaction
+def crash(queue):
+    queue.flush = lambda: 0   # The worker's last pass must not flush either
+    queue._stopped = True
+    queue._wakeup.set()
+    queue._thread.join()
+    queue._file.close()
+
+
+def task_titles(app):
+    with app.app_context():
+        return sorted(db.session.scalars(db.select(Task.title)))
+
+
+@pytest.fixture
+def queue(app):
+    queue = make_queue(app)
+    yield queue
+    if not queue._file.closed:
+        queue.close()
+
+
+def test_flush_inserts_queued_tasks_and_compacts_log(app, queue):
+    for title in ('a', 'b', 'c'):
+        queue.append(title, None)
+
+    assert queue.flush() == 3
+    assert len(queue) == 0
+    assert task_titles(app) == ['a', 'b', 'c']
+    assert read_log(queue.path) == ([], 3)
+
+
+def test_replay_after_crash_inserts_each_task_once(app):
+    queue = make_queue(app)
+    for title in ('a', 'b', 'c'):
+        queue.append(title, None)
+
+    # Crash after the first two entries were committed but before the log was compacted
+    with app.app_context():
+        queue._insert(queue._pending[:2])
+    crash(queue)
+    assert len(read_log(queue.path)[0]) == 3
+
+    # Replaying with a smaller batch than the committed one must not go back and redo it
+    replayed = make_queue(app, batch_size=1)
+    assert len(replayed) == 3
+    replayed.close()
+
+    assert task_titles(app) == ['a', 'b', 'c']
+    assert read_log(replayed.path) == ([], 3)
+
+
+def test_replay_ignores_torn_last_line(app):
+    queue = make_queue(app)
+    queue.append('a', None)
+    crash(queue)
+    with open(queue.path, 'a', encoding='utf-8') as fh:
+        fh.write('{"seq": 2, "title": "tor')
+
+    replayed = make_queue(app)
+    assert [e['title'] for e in replayed._pending] == ['a']
+    replayed.append('b', None)
+    replayed.close()
+
+    assert task_titles(app) == ['a', 'b']
+
+
+def test_poison_entry_is_dead_lettered_without_blocking_the_queue(app, queue):
+    queue.append('before', None)
+    queue.append(None, None)          # NOT NULL title
+    queue.append({'x': 1}, None)      # Type SQLite cannot bind
+    queue.append('after', None)
+
+    assert queue.flush() == 4
+    assert len(queue) == 0
+    assert task_titles(app) == ['after', 'before']
+
+    with open(queue.rejected_path, encoding='utf-8') as fh:
+        rejected = [json.loads(line) for line in fh]
+    assert [r['entry']['seq'] for r in rejected] == [2, 3]
+    assert all(r['error'] for r in rejected)
+
+    # Nothing is left to retry after a restart either
+    queue.close()
+    replayed = make_queue(app)
+    assert len(replayed) == 0
+    replayed.close()
+    assert task_titles(app) == ['after', 'before']
+
+
+def test_post_rejects_bad_title_before_queuing(app, client, queue):
+    app.extensions['write_behind'] = queue
+
+    assert client.post('/tasks/', json={'title': None}).status_code == 422
+    assert client.post('/tasks/', json={'title': 7}).status_code == 422
+    response = client.post('/tasks/', json={'title': 'ok'})
+
+    assert response.status_code == 202
+    assert response.get_json()['data']['id'] is None
+    assert [e['title'] for e in queue._pending] == ['ok']
@@ -0,0 +1,244 @@
+# write_behind.py
+
+import atexit
+import json
+import os
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from database import db
+from events import publish_task_event
+from models import Task, CollectionVersion
+
+# CollectionVersion row holding the sequence number of the last log entry written to SQLite
+FLUSHED_SEQ_KEY = 'task_write_behind'
+
+# Errors caused by the content of an entry (NOT NULL, unsupported type, bad timestamp...).
+# OperationalError (locked or unavailable database) is not one of them: it is retried.
+ENTRY_ERRORS = (SQLAlchemyError, KeyError, TypeError, ValueError)
+
+
+# Write-behind queue for POST /tasks/
+# A create is acknowledged once its entry is in an append-only log on disk (fsync'd;
+# concurrent requests share one fsync). A background thread then inserts the queued
+# tasks into SQLite in one transaction per batch, when batch_size entries are waiting
+# or every interval seconds. Each entry carries a sequence number and the last flushed
+# number is committed in the same transaction as the rows, so replaying the log after
+# a crash never inserts a task twice. An entry the database rejects is moved to a
+# dead-letter file (<log>.rejected) instead of blocking every entry queued after it.
+class WriteBehindQueue:
+    def __init__(self, app, path, batch_size=500, interval=0.05):
+        self.app = app
+        self.path = path
+        self.rejected_path = path + '.rejected'
+        self.batch_size = batch_size
+        self.interval = interval
+        self._lock = threading.Lock()        # Guards the log file handle and the pending list
+        self._sync_lock = threading.Lock()   # Serializes fsync calls
+        self._wakeup = threading.Event()
+        self._stopped = False
+
+        # Replay: everything still in the log is pending (already-flushed entries are skipped at flush time)
+        self._pending, last_seq = read_log(path)
+        self._next_seq = last_seq + 1
+        self._written = self._synced = last_seq
+        self._file = None
+        self._compact(last_seq)   # Start from a clean file (drops a torn last line)
+
+        self._thread = threading.Thread(target=self._run, name='task-write-behind', daemon=True)
+        self._thread.start()
+
+    # Durably queue one task; returns the queued entry
+    def append(self, title, description):
+        with self._lock:
+            entry = {
+                'seq': self._next_seq,
+                'title': title,
+                'description': description,
+                'created_at': datetime.utcnow().isoformat()
+            }
+            self._next_seq += 1
+            self._file.write(json.dumps(entry) + '\n')
+            self._file.flush()
+            self._written = entry['seq']
+            self._pending.append(entry)
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.set()
+        self._sync(entry['seq'])
+        return entry
+
+    # Group commit: one fsync covers every entry written before it started
+    def _sync(self, seq):
+        with self._sync_lock:
+            if self._synced >= seq:
+                return   # Another request's fsync already covered this entry
+            with self._lock:
+                target = self._written
+                fd = self._file.fileno()
+            os.fsync(fd)
+            self._synced = target
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    # Insert the pending entries in one transaction; returns the number of log entries flushed
+    def flush(self):
+        with self._lock:
+            batch = self._pending[:self.batch_size]
+        if not batch:
+            return 0
+
+        with self.app.app_context():
+            try:
+                created = self._insert(batch)
+            except OperationalError:
+                # Entries stay pending (and in the log); retried on the next tick
+                db.session.rollback()
+                current_app.logger.exception("Write-behind flush failed")
+                return 0
+            except ENTRY_ERRORS:
+                # Some entry is bad: insert one by one to find it and set it aside
+                db.session.rollback()
+                created, batch = self._insert_each(batch)
+                if not batch:
+                    return 0
+            for task in created:
+                publish_task_event('create', task)
+
+        with self._sync_lock, self._lock:
+            del self._pending[:len(batch)]
+            self._compact(batch[-1]['seq'])
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()   # Backlog left: flush again without waiting
+        return len(batch)
+
+    # Insert entries one at a time, dead-lettering those the database rejects;
+    # returns (created rows, leading part of batch that is now flushed)
+    def _insert_each(self, batch):
+        created = []
+        for i, entry in enumerate(batch):
+            try:
+                created += self._insert([entry])
+            except OperationalError:
+                db.session.rollback()
+                current_app.logger.exception("Write-behind flush failed")
+                return created, batch[:i]
+            except ENTRY_ERRORS as exc:
+                db.session.rollback()
+                current_app.logger.error("Write-behind entry %s rejected: %s", entry.get('seq'), exc)
+                self._reject(entry, exc)
+                try:
+                    self._insert([], flushed_seq=entry['seq'])   # Count it as flushed
+                except SQLAlchemyError:
+                    db.session.rollback()
+                    current_app.logger.exception("Write-behind flush failed")
+                    return created, batch[:i]
+        return created, batch
+
+    # Append a rejected entry and the reason to the dead-letter file
+    def _reject(self, entry, exc):
+        with open(self.rejected_path, 'a', encoding='utf-8') as fh:
+            fh.write(json.dumps({'entry': entry, 'error': str(exc)}, default=str) + '\n')
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    def _insert(self, batch, flushed_seq=None):
+        flushed = db.session.get(CollectionVersion, FLUSHED_SEQ_KEY)
+        if flushed is None:
+            flushed = CollectionVersion(name=FLUSHED_SEQ_KEY, version=0)
+            db.session.add(flushed)
+        # Entries at or below the stored sequence were committed before a crash
+        rows = [
+            {
+                'title': e['title'],
+                'description': e['description'],
+                'created_at': datetime.fromisoformat(e['created_at'])
+            }
+            for e in batch if e['seq'] > flushed.version
+        ]
+        created = []
+        if rows:
+            stmt = insert(Task).returning(Task.id, Task.title, Task.description, Task.created_at)
+            created = [row._asdict() for row in db.session.execute(stmt, rows)]
+        # Never move backwards: a replayed batch may end below what was already committed
+        flushed.version = max(flushed.version, flushed_seq or batch[-1]['seq'])
+        db.session.commit()
+        return created
+
+    # Rewrite the log as a checkpoint line plus the entries still pending (caller holds both locks)
+    def _compact(self, flushed_seq):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            fh.write(json.dumps({'checkpoint': flushed_seq}) + '\n')
+            for entry in self._pending:
+                fh.write(json.dumps(entry) + '\n')
+            fh.flush()
+            os.fsync(fh.fileno())
+        if self._file is not None:
+            self._file.close()
+        os.replace(tmp, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._synced = self._written
+
+    # Stop the worker and write out everything still queued
+    def close(self):
+        self._stopped = True
+        self._wakeup.set()
+        self._thread.join()
+        while self._pending and self.flush():
+            pass
+        with self._lock:
+            self._file.close()
+
+    def __len__(self):
+        return len(self._pending)
+
+
+# Read a write-behind log: returns (entries, highest sequence number seen)
+# A torn last line (crash in the middle of a write) was never acknowledged and is ignored.
+def read_log(path):
+    entries, last_seq = [], 0
+    if not os.path.exists(path):
+        return entries, last_seq
+    with open(path, encoding='utf-8') as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if 'checkpoint' in record:
+                last_seq = max(last_seq, record['checkpoint'])
+            else:
+                entries.append(record)
+                last_seq = max(last_seq, record['seq'])
+    return entries, last_seq
+
+
+# Enable write-behind creates when app.config['WRITE_BEHIND'] is true
+# (config: WRITE_BEHIND_LOG, WRITE_BEHIND_BATCH_SIZE, WRITE_BEHIND_INTERVAL)
+def init_write_behind(app):
+    app.config.setdefault('WRITE_BEHIND', False)
+    app.config.setdefault('WRITE_BEHIND_LOG', os.path.join(app.instance_path, 'tasks-write-behind.log'))
+    app.config.setdefault('WRITE_BEHIND_BATCH_SIZE', 500)
+    app.config.setdefault('WRITE_BEHIND_INTERVAL', 0.05)
+    if not app.config['WRITE_BEHIND']:
+        return
+
+    os.makedirs(os.path.dirname(app.config['WRITE_BEHIND_LOG']), exist_ok=True)
+    app.extensions['write_behind'] = WriteBehindQueue(
+        app,
+        app.config['WRITE_BEHIND_LOG'],
+        batch_size=app.config['WRITE_BEHIND_BATCH_SIZE'],
+        interval=app.config['WRITE_BEHIND_INTERVAL']
+    )
+    atexit.register(app.extensions['write_behind'].close)   # Flush what is left on clean shutdown
+
+
+# Queue of the current app, or None when write-behind is disabled
+def get_write_behind():
+    return current_app.extensions.get('write_behind')